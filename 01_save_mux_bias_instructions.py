@@ -1,12 +1,18 @@
 import os
 import re
-import json
+import functools
 import pprint
 import numpy as np
-import pandas as pd
+import openpyxl
+import orjson
 
+# Precompiled regular expressions for parsing bias cells.
+section_pattern = re.compile(r"NMOS|PMOS")
+paren_pattern = re.compile(r"\(.*?\)")
+range_pattern = re.compile(r"\s*([-+\d.eE]+)\s*to\s*([-+\d.eE]+)\s*in\s*steps\s*of\s*([-+\d.eE]+)")
 
-def extract_bias_data_from_excel(file_path, sheet_name="Sheet1"):
+
+def extract_bias_data_from_excel(file_path, sheet_name="Sheet1", max_empty_rows=50):
     """
     Extract bias data from an Excel file.
 
@@ -20,6 +26,9 @@ def extract_bias_data_from_excel(file_path, sheet_name="Sheet1"):
         Path to the Excel file.
     sheet_name : str, optional
         Name of the sheet to read from. Defaults to "Sheet1".
+    max_empty_rows : int, optional
+        Stop reading once this many consecutive empty rows are seen, so
+        formatting left far below the data isn't parsed. Defaults to 50.
 
     Returns:
     --------
@@ -39,11 +48,9 @@ def extract_bias_data_from_excel(file_path, sheet_name="Sheet1"):
             }
         }
     """
-    # Read the Excel file
-    df = pd.read_excel(file_path, sheet_name=sheet_name, engine='openpyxl')
-
-    # Remove empty rows and columns
-    df = df.dropna(how='all').reset_index(drop=True)
+    # Open the workbook in read-only mode so rows are streamed instead of
+    # building the whole sheet in memory
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
 
     # Define sections to look for
     sections = ["NMOS", "PMOS"]
@@ -51,27 +58,155 @@ def extract_bias_data_from_excel(file_path, sheet_name="Sheet1"):
 
     current_section = None
     current_sweep = None
+    section_dict = None
+    sweep_dict = None
+    n_empty_rows = 0
 
-    for idx, row in df.iterrows():
-        # Check for section headers in the first column
-        for section in sections:
-            if section in str(row[0]):
-                current_section = section
+    try:
+        ws = wb[sheet_name]
+        for row in ws.iter_rows(values_only=True):
+            # Skip empty rows, and stop once we are past the end of the data
+            if all(val is None for val in row):
+                n_empty_rows += 1
+                if n_empty_rows >= max_empty_rows:
+                    break
+                continue
+            n_empty_rows = 0
+
+            first_cell = str(row[0]) if row[0] is not None else ""
+
+            # Check for section headers in the first column
+            section_match = section_pattern.search(first_cell)
+            if section_match:
+                current_section = section_match.group(0)
                 current_sweep = None
-                break
+                section_dict = data[current_section]
+
+            # Look for rows that define a primary sweep
+            if "Primary sweep" in first_cell:
+                current_sweep = first_cell.strip()
+                sweep_dict = section_dict[current_sweep] = {}
+
+            # If we are in a known sweep, extract parameter values
+            if current_sweep and len(row) > 1 and row[1] is not None:
+                parameter = first_cell.strip()
+                values = [val for val in row[1:] if val is not None]
+                sweep_dict[parameter] = values
+    finally:
+        # Release the file handle held by the read-only workbook
+        wb.close()
 
-        # Look for rows that define a primary sweep
-        if "Primary sweep" in str(row[0]):
-            current_sweep = row[0].strip()
-            data[current_section][current_sweep] = {}
+    return data
 
-        # If we are in a known sweep, extract parameter values
-        if current_sweep and pd.notna(row[1]):
-            parameter = str(row[0]).strip()
-            values = [val for val in row[1:] if pd.notna(val)]
-            data[current_section][current_sweep][parameter] = values
 
-    return data
+def bias_range(start, end, step):
+    """
+    Generate the rounded sequence for a "start to end in steps of step" bias.
+
+    The number of points is computed once from the span and step, and the
+    sequence is built ascending as low + step * [0, 1, ..., n-1] and reversed
+    (as a view) when end < start, so descending ranges contain the same points
+    as their ascending counterparts. Unlike np.arange(low, high + step, step),
+    the point count can't pick up an extra point from floating-point error.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The float64 sequence from start to end (inclusive), rounded to 4 decimals.
+    """
+    low, high = (np.float64(start), np.float64(end)) if start <= end else (np.float64(end), np.float64(start))
+    n_points = int(np.floor((high - low) / step + 1e-9)) + 1
+    range_vals = low + np.float64(step) * np.arange(n_points)
+    if end < start:
+        range_vals = range_vals[::-1]
+    return np.round(range_vals, 4)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_bias_value(value):
+    """
+    Parse a single bias cell into its numeric form.
+
+    Results are cached on the raw cell value, since the same range or
+    discrete-value strings are typically repeated across many rows.
+
+    Parameters:
+    -----------
+    value : str, int or float
+        Raw cell value extracted from the bias spreadsheet.
+
+    Returns:
+    --------
+    numpy.ndarray, tuple, float or None
+        A read-only float64 array for ranges, a tuple of floats for zero and
+        discrete values, a float for single numeric strings, or None if the
+        value could not be parsed.
+    """
+    # 1) Check for direct 0 or "0"
+    if value == 0 or value == "0":
+        return (0.0,)
+
+    # 2) If it's a string, attempt to parse range or discrete sets
+    if not isinstance(value, str):
+        return None
+
+    # Remove any parentheses and "V"
+    cleaned_value = paren_pattern.sub("", value)
+    cleaned_value = cleaned_value.replace("V", "").strip()
+
+    # 2a) Check if it matches the "to ... steps of ..." pattern
+    if "to" in cleaned_value and "steps" in cleaned_value:
+
+        try:
+            range_match = range_pattern.match(cleaned_value)
+            start, end, step = map(float, range_match.groups())
+
+            range_vals = bias_range(start, end, step)
+            # The array is shared between cache hits, so keep it read-only
+            range_vals.flags.writeable = False
+            return range_vals
+
+        except Exception as e:
+            print(f"Error processing range: {value}. Error: {e}")
+
+    # 2b) Handle discrete values separated by '/'
+    elif "/" in cleaned_value:
+
+        try:
+            split_values = [v for v in map(str.strip, cleaned_value.split("/")) if v]
+            numeric_values = np.array(split_values, dtype=np.float64)
+            return tuple(numeric_values.tolist())
+        except Exception as e:
+            print(f"Error processing discrete values: {value}. Error: {e}")
+
+    else:
+
+        try:
+            return float(value)
+        except Exception as e:
+            # If the string doesn't match known patterns, print a warning.
+            print(f"Unhandled value format: {value}")
+
+    return None
+
+
+def process_bias_values(values):
+    """
+    Convert the raw cell values of one bias parameter into numeric form,
+    dropping cells that could not be parsed.
+    """
+    processed_values = []
+    append_value = processed_values.append
+
+    for value in values:
+        parsed_value = parse_bias_value(value)
+        if isinstance(parsed_value, tuple):
+            append_value(list(parsed_value))
+        elif parsed_value is not None:
+            # Range arrays are kept as numpy arrays; orjson serializes them directly
+            append_value(parsed_value)
+
+    return processed_values
 
 
 def process_bias_data(data):
@@ -92,79 +227,15 @@ def process_bias_data(data):
     --------
     dict
         The processed dictionary with the same structure but all parameter
-        values converted to numeric lists.
+        values converted to numeric lists (ranges as float64 numpy arrays).
     """
-    processed_data = {}
-
-    for section, sweeps in data.items():
-        processed_data[section] = {}
-        for sweep_type, parameters in sweeps.items():
-            processed_data[section][sweep_type] = {}
-            for param, values in parameters.items():
-                processed_values = []
-
-                for value in values:
-
-                    # 1) Check for direct 0 or "0"
-                    if value == 0 or value == "0":
-                        processed_values.append([0.0])
-
-                    # 2) If it's a string, attempt to parse range or discrete sets
-                    elif isinstance(value, str):
-                        # Remove any parentheses and "V"
-                        cleaned_value = re.sub(r"\(.*?\)", "", value)
-                        cleaned_value = cleaned_value.replace("V", "").strip()
-
-                        # 2a) Check if it matches the "to ... steps of ..." pattern
-                        if "to" in cleaned_value and "steps" in cleaned_value:
-
-                            try:
-                                start_str = cleaned_value.split("to")[0].strip()
-                                end_and_step = cleaned_value.split("to")[1]
-                                end_str = end_and_step.split("in")[0].strip()
-                                step_str = end_and_step.split("steps of")[1].strip()
-
-                                start = float(start_str)
-                                end = float(end_str)
-                                step = float(step_str)
-
-                                # Use np.arange to generate the numeric sequence
-                                if start<end:
-                                    range_vals = np.arange(start, end + step, step)
-                                if end < start:
-                                    range_vals = np.arange(end, start + step, step)
-                                    range_vals = np.flip(range_vals)
-                                processed_values.append([round(val, 4) for val in range_vals])
-
-                            except Exception as e:
-                                print(f"Error processing range: {value}. Error: {e}")
-
-                        # 2b) Handle discrete values separated by '/'
-                        elif "/" in cleaned_value:
-
-                            try:
-                                split_values = cleaned_value.split("/")
-                                numeric_values = []
-                                for v in split_values:
-                                    v = v.strip()
-                                    if v:
-                                        numeric_values.append(float(v))
-                                processed_values.append(numeric_values)
-                            except Exception as e:
-                                print(f"Error processing discrete values: {value}. Error: {e}")
-
-                        else:
-
-                            try:
-                                float_val = float(value)
-                                processed_values.append(float_val)
-                            except Exception as e:
-                                # If the string doesn't match known patterns, print a warning.
-                                print(f"Unhandled value format: {value}")
-
-                processed_data[section][sweep_type][param] = processed_values
-
-    return processed_data
+    return {
+        section: {
+            sweep_type: {param: process_bias_values(values) for param, values in parameters.items()}
+            for sweep_type, parameters in sweeps.items()
+        }
+        for section, sweeps in data.items()
+    }
 
 
 def save_processed_bias_data_to_json(processed_data, output_file):
@@ -179,31 +250,38 @@ def save_processed_bias_data_to_json(processed_data, output_file):
         Path to the output JSON file.
     """
     try:
-        with open(output_file, 'w') as f:
-            json.dump(processed_data, f, indent=4)
+        # Serialize fully before opening the file, so a failed encode doesn't
+        # truncate an existing output, and the file is written in one call
+        data_bytes = orjson.dumps(processed_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        with open(output_file, 'wb') as f:
+            f.write(data_bytes)
         print(f"Processed data successfully saved to '{output_file}'")
     except Exception as e:
         print(f"Failed to save processed data to '{output_file}'. Error: {e}")
 
 
-# 1. Extract raw bias data from an Excel file.
-excel_bias_file = "test_biases.xlsx"
-raw_data = extract_bias_data_from_excel(excel_bias_file)
+if __name__ == "__main__":
+    # Set BIAS_VERBOSE=1 to print the processed data for verification
+    verbose = os.environ.get("BIAS_VERBOSE") == "1"
 
-# 2. Process the extracted bias data to convert strings to numeric lists.
-processed_data = process_bias_data(raw_data)
+    # 1. Extract raw bias data from an Excel file.
+    excel_bias_file = "test_biases.xlsx"
+    raw_data = extract_bias_data_from_excel(excel_bias_file)
 
-# 3. Save processed bias data to a JSON file.
-output_json_path = "sweep_bias_instructions_v3.json"
-save_processed_bias_data_to_json(processed_data, output_json_path)
+    # 2. Process the extracted bias data to convert strings to numeric lists.
+    processed_data = process_bias_data(raw_data)
 
-# 4. (Optional) Print processed data for verification
-pprint.pprint(processed_data)
-for section_name, sweeps in processed_data.items():
-    print(f"\n================= {section_name} =================")
-    for sweep_type, parameters in sweeps.items():
-        print(f"--- {sweep_type} ---")
-        for param, values_list in parameters.items():
-            print(f"Param: {param}, Values: {values_list}")
-        print()
+    # 3. Save processed bias data to a JSON file.
+    output_json_path = "sweep_bias_instructions_v3.json"
+    save_processed_bias_data_to_json(processed_data, output_json_path)
 
+    # 4. (Optional) Print processed data for verification
+    if verbose:
+        pprint.pprint(processed_data)
+        for section_name, sweeps in processed_data.items():
+            print(f"\n================= {section_name} =================")
+            for sweep_type, parameters in sweeps.items():
+                print(f"--- {sweep_type} ---")
+                for param, values_list in parameters.items():
+                    print(f"Param: {param}, Values: {values_list}")
+                print()
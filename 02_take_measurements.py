@@ -3,7 +3,17 @@ import time
 import numpy as np
 import os
 import json
+import functools
+import contextlib
 import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+import matplotlib
+
+# Set HEADLESS=1 to save plots without a GUI backend (live plotting is then not shown)
+if os.environ.get("HEADLESS") == "1":
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 
@@ -31,41 +41,53 @@ def drange(start, stop, step):
 
     return result
 
-def plot_data(Vd_meas_list, Id_meas_list, Vds_list, save_path):
+def plot_data(Vd_meas_list, Id_meas_list, Vds_list, save_path, show=False):
     """Generates and saves plots for Id_meas vs. Vd_meas and Id_meas vs. Vds."""
 
     if not os.path.exists(save_path):
         os.makedirs(save_path)  # Create directory if it doesn't exist
 
     if Vd_meas_list is not None and Id_meas_list is not None and Vds_list is not None:
+        # One figure is reused for both plots and closed afterwards
+        fig, ax = plt.subplots(figsize=(8, 6))
+
         # Plot Id_meas vs Vd_meas
-        plt.figure(figsize=(8, 6))
-        plt.plot(Vd_meas_list, Id_meas_list, marker='o', linestyle='-', color='b', label="Id_meas vs Vd_meas")
-        plt.xlabel("Vd_meas (V)")
-        plt.ylabel("Id_meas (A)")
-        plt.title("Id_meas vs Vd_meas")
-        plt.legend()
-        plt.grid(True)
-        plt.savefig(f"{save_path}Id_meas_vs_Vd_meas.png", dpi=300)  # Save plot
-        plt.show()
+        ax.plot(Vd_meas_list, Id_meas_list, marker='o', linestyle='-', color='b', label="Id_meas vs Vd_meas")
+        ax.set_xlabel("Vd_meas (V)")
+        ax.set_ylabel("Id_meas (A)")
+        ax.set_title("Id_meas vs Vd_meas")
+        ax.legend()
+        ax.grid(True)
+        fig.savefig(os.path.join(save_path, "Id_meas_vs_Vd_meas.png"), dpi=300)  # Save plot
 
         # Plot Id_meas vs Vds
-        plt.figure(figsize=(8, 6))
-        plt.plot(Vds_list, Id_meas_list, marker='s', linestyle='-', color='r', label="Id_meas vs Vds")
-        plt.xlabel("Vds (V)")
-        plt.ylabel("Id_meas (A)")
-        plt.title("Id_meas vs Vds")
-        plt.legend()
-        plt.grid(True)
-        plt.savefig(f"{save_path}Id_meas_vs_Vds.png", dpi=300)  # Save plot
-        plt.show()
+        ax.clear()
+        ax.plot(Vds_list, Id_meas_list, marker='s', linestyle='-', color='r', label="Id_meas vs Vds")
+        ax.set_xlabel("Vds (V)")
+        ax.set_ylabel("Id_meas (A)")
+        ax.set_title("Id_meas vs Vds")
+        ax.legend()
+        ax.grid(True)
+        fig.savefig(os.path.join(save_path, "Id_meas_vs_Vds.png"), dpi=300)  # Save plot
+
+        if show:
+            plt.show()
+        plt.close(fig)
+
+@functools.lru_cache(maxsize=8)
+def load_json_cached(json_file, mtime_ns):
+    """
+    Parses a JSON file once per (path, modification time), so repeated loads of
+    an unchanged file return the already-parsed dict. Treat the result as read-only.
+    """
+    with open(json_file, "r") as f:
+        return json.load(f)
 
 def load_mux_instructions(json_file="mux_instructions.json"):
     """
     Loads multiplexer configuration instructions from a JSON file.
     """
-    with open(json_file, "r") as f:
-        mux_data = json.load(f)
+    mux_data = load_json_cached(json_file, os.stat(json_file).st_mtime_ns)
     return mux_data
 
 def load_sweep_bias_instructions_from_json(input_file):
@@ -73,8 +95,7 @@ def load_sweep_bias_instructions_from_json(input_file):
     Loads and returns sweep/bias instructions from a JSON file.
     """
     try:
-        with open(input_file, 'r') as f:
-            data = json.load(f)
+        data = load_json_cached(input_file, os.stat(input_file).st_mtime_ns)
         print(f"Processed data successfully loaded from {input_file}")
         return data
     except Exception as e:
@@ -85,69 +106,66 @@ def insert_evenly_spaced_points_partial(lst, start, stop, num_points):
     if num_points < 1:
         raise ValueError("Number of points to add must be at least 1.")
 
-    new_list = []
-    for i in range(len(lst) - 1):
-        current = lst[i]
-        next_val = lst[i + 1]
-        new_list.append(current)
-
-        sorted_pair = sorted([current, next_val])
-        lower_val, upper_val = sorted_pair[0], sorted_pair[1]
-        lower_overlap = max(lower_val, start)
-        upper_overlap = min(upper_val, stop)
-
-        if lower_overlap < upper_overlap:
-            step = (upper_overlap - lower_overlap) / (num_points + 1)
-            ascending_subsegment = (current < next_val)
-            inserted_points = []
-            for n in range(1, num_points + 1):
-                new_point = lower_overlap + step * n
-                inserted_points.append(new_point)
-            if not ascending_subsegment:
-                inserted_points.reverse()
-            new_list.extend(inserted_points)
-
-    new_list.append(lst[-1])
-    new_list = [round(n, 3) for n in new_list]
-    return new_list
+    arr = np.asarray(lst, dtype=np.float64)
+    current, next_val = arr[:-1], arr[1:]
+
+    # Overlap of every adjacent segment with [start, stop]
+    lower_overlap = np.maximum(np.minimum(current, next_val), start)
+    upper_overlap = np.minimum(np.maximum(current, next_val), stop)
+    has_overlap = lower_overlap < upper_overlap
+
+    # One row per segment: the segment's first value followed by its inserted points
+    step = (upper_overlap - lower_overlap) / (num_points + 1)
+    inserted_points = lower_overlap[:, None] + step[:, None] * np.arange(1, num_points + 1)
+    descending = current > next_val
+    inserted_points[descending] = inserted_points[descending, ::-1]
+    rows = np.column_stack((current, inserted_points))
+
+    # Keep inserted points only for segments that overlap [start, stop]
+    keep = np.ones(rows.shape, dtype=bool)
+    keep[~has_overlap, 1:] = False
+    new_list = np.append(rows[keep], arr[-1]).tolist()
+
+    # The input values go back in as the original items; round() (not np.round)
+    # so every value rounds exactly as the per-item loop did
+    original_positions = np.concatenate(([0], np.cumsum(keep.sum(axis=1)))).tolist()
+    for position, item in zip(original_positions, lst):
+        new_list[position] = item
+    return [round(n, 3) for n in new_list]
 
 
 def apply_log_spacing_after_changepoint(values, changepoint_value):
-    all_negative = all(v < 0 for v in values)
+    arr = np.asarray(values, dtype=np.float64)
+    all_negative = bool((arr < 0).all())
     if all_negative:
-        pos_values = [-v for v in values]
+        arr = np.negative(arr)
         cp_val = -changepoint_value
     else:
-        pos_values = values[:]
         cp_val = changepoint_value
 
-    try:
-        cp_index = pos_values.index(cp_val)
-    except ValueError:
+    cp_matches = np.flatnonzero(arr == cp_val)
+    if cp_matches.size == 0:
         raise ValueError(
             f"The changepoint_value={changepoint_value} (or {cp_val} if flipped) was not found in the input list."
         )
+    cp_index = cp_matches[0]
 
-    output = pos_values[:cp_index + 1]
-    n_points_to_fill = len(pos_values) - (cp_index + 1)
+    output = arr[:cp_index + 1]
+    n_points_to_fill = len(arr) - (cp_index + 1)
     if n_points_to_fill <= 0:
         final_output = output
     else:
-        start_val = pos_values[cp_index]
-        end_val = pos_values[-1]
+        start_val = arr[cp_index]
+        end_val = arr[-1]
         if start_val <= 0 or end_val <= 0:
             raise ValueError("Cannot create log spacing with non-positive start or end value.")
-        n_log_points = n_points_to_fill + 1
-        log_spaced = np.logspace(np.log10(start_val),
-                                 np.log10(end_val),
-                                 n_log_points + 1)
-        new_segment = log_spaced[1:n_log_points + 1]
-        final_output = output + list(new_segment)
+        # n_points_to_fill + 1 points including the changepoint itself, which is dropped
+        new_segment = np.logspace(np.log10(start_val), np.log10(end_val), n_points_to_fill + 1)[1:]
+        final_output = np.concatenate((output, new_segment))
 
     if all_negative:
-        final_output = [-v for v in final_output]
-    final_output = [round(f, 3) for f in final_output]
-    return final_output
+        final_output = np.negative(final_output)
+    return np.round(final_output, 3).tolist()
 
 
 def load_bias_instructions(fet_type="NMOS", input_json_path = 'sweep_bias_instructions_v3.json'):
@@ -166,8 +184,9 @@ def load_bias_instructions(fet_type="NMOS", input_json_path = 'sweep_bias_instru
         return (None, None, None)
 
     # Extract relevant sections
-    transfer_char_set1 = processed_data.get(fet_type, {}).get('Primary sweep: Vgs', {})
-    transfer_char = processed_data.get(fet_type, {}).get('Primary sweep: Vds', {})
+    fet_data = processed_data.get(fet_type, {})
+    transfer_char_set1 = fet_data.get('Primary sweep: Vgs', {})
+    transfer_char = fet_data.get('Primary sweep: Vds', {})
 
     transfer_char_set1_vdrain_source = transfer_char_set1.get("Vd", [])
     transfer_char_set1_vgate_source = transfer_char_set1.get("Vg", [])
@@ -190,38 +209,60 @@ def configure_instr(sourcing_voltage,
                     disable_front_panel=True,
                     curr_range_hard_set=False,
                     voltage_range=20,
-                    non_SCPI_curr_range=8):
+                    non_SCPI_curr_range=8,
+                    source_delay=None,
+                    nplc=1,
+                    averaging=True,
+                    autozero=True):
     try:
         if ascii_command_flavor == 'SCPI':
             instr.write('*RST')
+            # Everything after the reset goes out as one compound SCPI message
+            # so the configuration costs a single bus transaction
+            commands = []
             if disable_front_panel:
-                instr.write(":DISP:ENAB OFF")
+                commands.append(":DISP:ENAB OFF")
             if wire_mode == 2:
-                instr.write(":SYST:RSEN OFF")
+                commands.append(":SYST:RSEN OFF")
             elif wire_mode == 4:
-                instr.write(":SYST:RSEN ON")
+                commands.append(":SYST:RSEN ON")
             else:
                 print('Invalid wire_mode passed, please pass 2 or 4')
-            instr.write(':SOUR:FUNC VOLT')
-            instr.write(':SOUR:VOLT:RANG:AUTO ON')
-            #instr.write(':SOUR:VOLT:MODE FIXED')
-            #instr.write(f':SOUR:VOLT:RANG {voltage_range}')
-            instr.write(f':SENS:VOLT:PROT {voltage_compliance}')
-            instr.write(f':SOUR:VOLT {sourcing_voltage}')
-            instr.write(':SENS:FUNC "CURR"')
-            instr.write(f':SENS:CURR:PROT {current_compliance}')
+            commands.append(':SOUR:FUNC VOLT')
+            commands.append(':SOUR:VOLT:RANG:AUTO ON')
+            #commands.append(':SOUR:VOLT:MODE FIXED')
+            #commands.append(f':SOUR:VOLT:RANG {voltage_range}')
+            commands.append(f':SENS:VOLT:PROT {voltage_compliance}')
+            commands.append(f':SOUR:VOLT {sourcing_voltage}')
+            # Settling is applied by the SMU after every level change, before :READ? measures.
+            # Left unset, the 2400 keeps its auto source delay
+            if source_delay is not None:
+                commands.append(f':SOUR:DEL {source_delay}')
+            commands.append(':SENS:FUNC "CURR"')
+            commands.append(f':SENS:CURR:PROT {current_compliance}')
             if curr_range_hard_set:
-                instr.write(':SENS:CURR:RANG:AUTO OFF')
-                instr.write(f':SENS:CURR:RANG {current_range}')
+                commands.append(':SENS:CURR:RANG:AUTO OFF')
+                commands.append(f':SENS:CURR:RANG {current_range}')
+            else:
+                commands.append(':SENS:CURR:RANG:AUTO ON')
+            # Integration time per reading in power-line cycles; lower is faster but noisier
+            commands.append(f':SENS:CURR:NPLC {nplc}')
+            commands.append(f':SYST:AZER:STAT {"ON" if autozero else "OFF"}')
+            if averaging:
+                commands.append(':SENS:AVER:COUN 4')
+                commands.append(':SENS:AVER:TCON REP')
+                commands.append(':SENS:AVER:STAT ON')
             else:
-                instr.write(':SENS:CURR:RANG:AUTO ON')
-            instr.write(':SENS:AVER:COUN 4')
-            instr.write(':SENS:AVER:TCON REP')
-            instr.write(':SENS:AVER:STAT ON')
-            instr.write(':OUTP ON')
+                commands.append(':SENS:AVER:STAT OFF')
+            # Readings come back as little-endian 32-bit floats (voltage, current)
+            commands.append(':FORM:ELEM VOLT,CURR')
+            commands.append(':FORM:DATA REAL,32')
+            commands.append(':FORM:BORD SWAP')
+            commands.append(':OUTP ON')
+            instr.write(';'.join(commands))
         elif ascii_command_flavor == 'non-SCPI':
             instr.write("F0,0X")
-            instr.write(f'B{sourcing_voltage},0,0X')
+            instr.write(f'B{sourcing_voltage},0,{int(round((source_delay or 0) * 1000))}X')
             instr.write(f"L{current_compliance},{non_SCPI_curr_range}X")
             instr.write("P2X")
             instr.write("S2X")
@@ -236,30 +277,57 @@ def configure_instr(sourcing_voltage,
         print(e)
 
 
+# Pre-encoded command templates, including the '\r' write termination, so the per-point
+# path can use write_raw without formatting a str and encoding it each time
+scpi_set_voltage_template = b':SOUR:VOLT %g\r'
+non_scpi_set_voltage_template = b'B%g,0,0X\r'
+non_scpi_set_voltage_delay_template = b'B%g,0,%dX;'
+
+
 def set_voltage(sourcing_voltage, instr, ascii_command_flavor='SCPI', non_SCPI_voltage_range=0):
     try:
         if ascii_command_flavor == 'SCPI':
-            instr.write(f':SOUR:VOLT {sourcing_voltage}')
+            instr.write_raw(scpi_set_voltage_template % sourcing_voltage)
         elif ascii_command_flavor == 'non-SCPI':
-            instr.write(f'B{sourcing_voltage},0,0X')
+            instr.write_raw(non_scpi_set_voltage_template % sourcing_voltage)
         else:
             raise ValueError("Invalid ascii_command_flavor: Use 'non-SCPI' or 'SCPI'.")
     except ValueError as e:
         print(e)
 
 
+# Pre-encoded non-SCPI (236/237) readout commands
+non_scpi_measure_command = b"O1X;G4,2,0X;H0X;\r"
+non_scpi_execute_command = b"X\r"
+
+
+def query_real32(instr, command, data_points=2):
+    """
+    Sends a SCPI query and reads the little-endian REAL,32 reply.
+
+    The 2400 sends the floats as an indefinite-length (#0) block, so the read
+    termination is switched off while reading: a float with a carriage-return
+    byte (0x0D) would otherwise end the read early. The reply length comes from
+    data_points instead, and the termination is restored afterwards.
+    """
+    read_termination = instr.read_termination
+    instr.read_termination = None
+    try:
+        return instr.query_binary_values(command, datatype='f', is_big_endian=False, container=np.array,
+                                         data_points=data_points)
+    finally:
+        instr.read_termination = read_termination
+
+
 def measure_iv(instr, ascii_command_flavor='SCPI'):
     try:
         if ascii_command_flavor.upper() == 'SCPI':
-            response = instr.query(":READ?")
-            data = response.strip().split(',')
-            voltage = float(data[0])
-            current = float(data[1])
-            return (voltage, current)
+            data = query_real32(instr, ":READ?")
+            return (float(data[0]), float(data[1]))
         elif ascii_command_flavor == 'non-SCPI':
-            commands = "O1X;G4,2,0X;H0X;"
-            instr.write(commands)
-            response = instr.query("X")
+            instr.write_raw(non_scpi_measure_command)
+            instr.write_raw(non_scpi_execute_command)
+            response = instr.read()
             current = float(response.strip())
             return (None, current)
         else:
@@ -269,11 +337,39 @@ def measure_iv(instr, ascii_command_flavor='SCPI'):
         return (None, None)
 
 
+def set_voltage_and_measure_iv(sourcing_voltage, instr, ascii_command_flavor='SCPI', settle_delay=0):
+    """
+    Sets the source voltage and takes a reading in one bus round trip.
+
+    For SCPI instruments the level and :READ? go out as one compound query; any
+    settling is left to the instrument's source delay. For non-SCPI (236/237)
+    instruments the settle delay is passed as the source delay field of the
+    B command, so the SMU waits before measuring instead of Python sleeping.
+    """
+    try:
+        if ascii_command_flavor.upper() == 'SCPI':
+            data = query_real32(instr, f":SOUR:VOLT:LEV {sourcing_voltage};:READ?")
+            return (float(data[0]), float(data[1]))
+        elif ascii_command_flavor == 'non-SCPI':
+            delay_ms = int(round(settle_delay * 1000))
+            instr.write_raw(non_scpi_set_voltage_delay_template % (sourcing_voltage, delay_ms)
+                            + non_scpi_measure_command)
+            instr.write_raw(non_scpi_execute_command)
+            response = instr.read()
+            current = float(response.strip())
+            return (None, current)
+        else:
+            raise ValueError("Invalid ascii_command_flavor.")
+    except Exception as e:
+        print("Error in set_voltage_and_measure_iv:", e)
+        return (None, None)
+
+
 def measure_current(instr, ascii_command_flavor='SCPI'):
     try:
         if ascii_command_flavor.upper() == 'SCPI':
-            response = instr.query(":READ?")
-            current = float(response.strip().split(',')[1])
+            response = query_real32(instr, ":READ?")
+            current = float(response[1])
         elif ascii_command_flavor == 'non-SCPI':
             commands = "O1X;G4,2,0X;H0X;"
             instr.write(commands)
@@ -294,6 +390,12 @@ def measure_current(instr, ascii_command_flavor='SCPI'):
 # -----------------------------------------------------------------------------------------------------------------------
 #                           UPDATED VOLTAGE SWEEP FUNCTION (NOW WITH TEMPERATURE)
 # -----------------------------------------------------------------------------------------------------------------------
+# Named columns of the array returned by voltage_sweep_three_instruments
+sweep_dtype = np.dtype([('Vd_src', 'f8'), ('Vg_src', 'f8'), ('Id', 'f8'), ('Ig', 'f8')])
+# Same columns in float32, for the binary .npy archive of each sweep
+sweep_dtype_f32 = np.dtype([(name, 'f4') for name in sweep_dtype.names])
+
+
 def voltage_sweep_three_instruments(
         fixed,
         variable,
@@ -306,14 +408,33 @@ def voltage_sweep_three_instruments(
         drain_curr_range=0.01,
         settle_delay=0.05,
         non_SCPI_curr_range=5,
-        manual_ranging=True
+        manual_ranging=True,
+        plot_every=5,
+        plot_interval=0.25,
+        measure_fixed_every=1,
+        concurrent_reads=False,
+        initial_settle=0.5,
+        return_to_zero=True
 ):
     """
     Sweeps the 'variable' voltage while holding the other nodes constant.
     Now in addition to measuring currents and voltages
 
-    The returned data tuple now contains 15 elements:
-      (Vd_src, Vg_src, Vb_src, Vsub_src, Id, Ib, Isub, Ig, Vd_meas, Vb_meas, Vsub_meas, Vg_meas, TempA, TempB, Elapsed_time)
+    Returns a structured array (dtype sweep_dtype) with one record per sweep point:
+      (Vd_src, Vg_src, Id, Ig)
+
+    The fixed node's current is read every measure_fixed_every points (and on the
+    last point); it is NaN on the points in between. The default of 1 reads it on
+    every point. Manual ranging only reacts to points where Id was read.
+
+    With concurrent_reads=True the fixed node is read on a worker thread while the
+    swept node is set and measured. Only worthwhile when the SMUs are on separate
+    buses, and the fixed-node reading is then no longer taken after the swept
+    node has settled.
+
+    initial_settle is the wait (s) before setting the fixed node and before zeroing
+    the variable node. With return_to_zero=False both SMUs are left at their last
+    voltages, for callers that zero them and cool down once themselves.
     """
     # --- Prepare live plot with an extra temperature subplot if requested ---
     if live_plot:
@@ -343,15 +464,20 @@ def voltage_sweep_three_instruments(
         fig_all.tight_layout()
         fig_all.show()
 
-    # Prepare arrays for final data and for live plotting:
-    data = []
-    plotting_voltages = []  # x-axis for the sweep
-    plotting_drain_source_currents = []
-    plotting_gate_source_currents = []
-    plotting_drain_source_voltages = []
-    plotting_gate_source_voltages = []
+        # Between full redraws only the lines are redrawn, blitted over cached axes
+        # backgrounds, when the backend supports it
+        canvas = fig_all.canvas
+        use_blit = canvas.supports_blit
+        plot_lines = ((ax0_left, line_drain_source_i), (ax1_left, line_gate_source_i))
+        for _, line in plot_lines:
+            line.set_animated(use_blit)
 
-    time.sleep(0.5)
+    # Preallocate the final data; the live plot draws straight from its columns.
+    # Missing readings (None) are stored as NaN.
+    sweep_array = np.asarray(sweep_voltages, dtype=np.float64)  # x-axis for the sweep
+    data = np.empty(len(sweep_array), dtype=sweep_dtype)
+
+    time.sleep(initial_settle)
     # Set the "fixed" node:
     if fixed == 'Vd':
         set_voltage(fixed_voltage, drain_source_instr, ascii_command_flavor='non-SCPI')
@@ -360,7 +486,7 @@ def voltage_sweep_three_instruments(
     else:
         print("Warning: 'fixed' should be 'Vd' or 'Vg' in this example code.")
 
-    time.sleep(0.5)
+    time.sleep(initial_settle)
     # Initialize the "variable" node to 0 V:
     if variable == 'Vd':
         set_voltage(0, drain_source_instr, ascii_command_flavor='non-SCPI')
@@ -369,86 +495,153 @@ def voltage_sweep_three_instruments(
     else:
         print("Warning: 'variable' should be 'Vd' or 'Vg' in this example code.")
 
-    for v_value in sweep_voltages:
-        # Update the "variable" voltage:
-        if variable == 'Vd':
-            set_voltage(v_value, drain_source_instr, ascii_command_flavor='non-SCPI')
-        else:  # variable == 'Vg'
-            set_voltage(v_value, gate_source_instr, ascii_command_flavor='non-SCPI')
-        time.sleep(settle_delay)
-
-        # Measure currents and voltages:
-        d_v, d_i = measure_iv(drain_source_instr, ascii_command_flavor='non-SCPI')
-        g_v, g_i = measure_iv(gate_source_instr, ascii_command_flavor='non-SCPI')
-
-        # Re-map fixed/variable source voltages:
-        if fixed == 'Vd' and variable == 'Vg':
-            Vd_src = fixed_voltage
-            Vg_src = v_value
-        elif fixed == 'Vg' and variable == 'Vd':
-            Vg_src = fixed_voltage
-            Vd_src = v_value
-        else:
-            Vd_src = 0
-            Vg_src = 0
-
-
-        data.append((
-            Vd_src, Vg_src,   # Source voltages
-            d_i, g_i  # Measured currents
-        ))
-
-        # --- Update live plots (if enabled) ---
-        if live_plot:
-            plotting_voltages.append(v_value)
-            plotting_drain_source_currents.append(d_i)
-            plotting_gate_source_currents.append(g_i)
-            plotting_drain_source_voltages.append(d_v if d_v is not None else 0)
-            plotting_gate_source_voltages.append(g_v if g_v is not None else 0)
-
-            # Update current and voltage lines:
-            line_drain_source_i.set_data(plotting_voltages, plotting_drain_source_currents)
-            line_gate_source_i.set_data(plotting_voltages, plotting_gate_source_currents)
-
-            # Rescale current and voltage axes:
-            for ax in [ax0_left, ax1_left]:
-                ax.relim()
-                ax.autoscale_view()
-
-            fig_all.canvas.draw()
-            fig_all.canvas.flush_events()
-        if manual_ranging:
-            if abs(d_i) >= (curr_compliance*.90): #if drain current is 90% of current compliance
-                curr_compliance = curr_compliance * 10
-                non_SCPI_curr_range = non_SCPI_curr_range + 1
-                print(f"Changing current compliance to {curr_compliance} and range to {non_SCPI_curr_range}")
-                configure_instr(v_value,
-                                drain_source_instr,
-                                current_compliance=curr_compliance,
-                                ascii_command_flavor='non-SCPI',
-                                wire_mode=drain_instr_wire_mode,
-                                disable_front_panel=disable_front_panel,
-                                curr_range_hard_set=False,
-                                current_range=0.5,
-                                non_SCPI_curr_range=non_SCPI_curr_range)
-                time.sleep(30)
-                # horrendous hack--lets measure currents and voltages once to get rid of small spike from data after ranging:
-                blah, blah2 = measure_iv(drain_source_instr, ascii_command_flavor='non-SCPI')
-                blahh, blahh2 = measure_iv(gate_source_instr, ascii_command_flavor='non-SCPI')
-
-
-    time.sleep(0.5) #if you go to fast the older smus give an out of range error, so just keep this in there
-
-    # Return SMU outputs to 0 V:
-    set_voltage(0, drain_source_instr, ascii_command_flavor='non-SCPI')
-    set_voltage(0, gate_source_instr, ascii_command_flavor='non-SCPI')
-    time.sleep(0.5)
+    if variable == 'Vd':
+        swept_instr, fixed_instr = drain_source_instr, gate_source_instr
+    else:  # variable == 'Vg'
+        swept_instr, fixed_instr = gate_source_instr, drain_source_instr
+
+    # With concurrent_reads the fixed node is read on a worker thread that lives
+    # only for this sweep
+    with (ThreadPoolExecutor(max_workers=1) if concurrent_reads
+          else contextlib.nullcontext()) as fixed_executor:
+        last_draw = time.monotonic()
+        for i, v_value in enumerate(sweep_voltages):
+            measure_fixed = i % measure_fixed_every == 0 or i == len(sweep_array) - 1
+            if measure_fixed and concurrent_reads:
+                fixed_future = fixed_executor.submit(measure_iv, fixed_instr, ascii_command_flavor='non-SCPI')
+
+            # Update the "variable" voltage and measure it in the same round trip,
+            # then measure the fixed node when due:
+            swept_v, swept_i = set_voltage_and_measure_iv(v_value, swept_instr, ascii_command_flavor='non-SCPI',
+                                                          settle_delay=settle_delay)
+            if not measure_fixed:
+                fixed_v, fixed_i = None, None
+            elif concurrent_reads:
+                fixed_v, fixed_i = fixed_future.result()
+            else:
+                fixed_v, fixed_i = measure_iv(fixed_instr, ascii_command_flavor='non-SCPI')
+
+            if variable == 'Vd':
+                (d_v, d_i), (g_v, g_i) = (swept_v, swept_i), (fixed_v, fixed_i)
+            else:  # variable == 'Vg'
+                (g_v, g_i), (d_v, d_i) = (swept_v, swept_i), (fixed_v, fixed_i)
+
+            # Re-map fixed/variable source voltages:
+            if fixed == 'Vd' and variable == 'Vg':
+                Vd_src = fixed_voltage
+                Vg_src = v_value
+            elif fixed == 'Vg' and variable == 'Vd':
+                Vg_src = fixed_voltage
+                Vd_src = v_value
+            else:
+                Vd_src = 0
+                Vg_src = 0
+
+
+            data[i] = (
+                Vd_src, Vg_src,   # Source voltages
+                d_i, g_i  # Measured currents
+            )
+
+            # --- Update live plots (if enabled) ---
+            if live_plot:
+                # Update current and voltage lines:
+                line_drain_source_i.set_data(sweep_array[:i + 1], data['Id'][:i + 1])
+                line_gate_source_i.set_data(sweep_array[:i + 1], data['Ig'][:i + 1])
+
+                # Rescale and redraw the whole figure only every plot_every points, or once
+                # plot_interval seconds have passed since the last one, and on the final point
+                if (i % plot_every == 0 or i == len(sweep_array) - 1
+                        or time.monotonic() - last_draw > plot_interval):
+                    for ax, _ in plot_lines:
+                        ax.relim()
+                        ax.autoscale_view()
+                    if use_blit:
+                        canvas.draw()
+                        backgrounds = [canvas.copy_from_bbox(ax.bbox) for ax, _ in plot_lines]
+                    else:
+                        canvas.draw_idle()
+                    last_draw = time.monotonic()
+
+                if use_blit:
+                    for (ax, line), background in zip(plot_lines, backgrounds):
+                        canvas.restore_region(background)
+                        ax.draw_artist(line)
+                        canvas.blit(ax.bbox)
+                canvas.flush_events()
+            if manual_ranging:
+                if d_i is not None and abs(d_i) >= (curr_compliance*.90): #if drain current is 90% of current compliance
+                    curr_compliance = curr_compliance * 10
+                    non_SCPI_curr_range = non_SCPI_curr_range + 1
+                    print(f"Changing current compliance to {curr_compliance} and range to {non_SCPI_curr_range}")
+                    configure_instr(v_value,
+                                    drain_source_instr,
+                                    current_compliance=curr_compliance,
+                                    ascii_command_flavor='non-SCPI',
+                                    wire_mode=drain_instr_wire_mode,
+                                    disable_front_panel=disable_front_panel,
+                                    curr_range_hard_set=False,
+                                    current_range=0.5,
+                                    non_SCPI_curr_range=non_SCPI_curr_range,
+                                    source_delay=settle_delay)
+                    time.sleep(30)
+                    # horrendous hack--lets measure currents and voltages once to get rid of small spike from data after ranging:
+                    blah, blah2 = measure_iv(drain_source_instr, ascii_command_flavor='non-SCPI')
+                    blahh, blahh2 = measure_iv(gate_source_instr, ascii_command_flavor='non-SCPI')
+
+
+    if return_to_zero:
+        time.sleep(0.5) #if you go to fast the older smus give an out of range error, so just keep this in there
+
+        # Return SMU outputs to 0 V:
+        set_voltage(0, drain_source_instr, ascii_command_flavor='non-SCPI')
+        set_voltage(0, gate_source_instr, ascii_command_flavor='non-SCPI')
+        time.sleep(0.5)
     if live_plot:
         plt.close(fig_all)
 
     return data
 
 
+def save_output_char_data(output_char_data, mystic_csv_path, csv_path, npy_path):
+    """
+    Saves one output-characteristics sweep as a mystic-format CSV, a 4-column CSV
+    and a float32 .npy archive.
+    """
+    # Format every column to text once; both CSV files are assembled from these strings
+    # (7 significant digits is well past the SMU resolution)
+    Vd_str, Vg_str, Id_str, Ig_str = (np.char.mod('%.7g', output_char_data[name]).tolist()
+                                      for name in sweep_dtype.names)
+
+    # Build the CSV in memory, then write it to disk in one call
+    csv_buffer = io.StringIO()
+    writer = csv.writer(csv_buffer)
+
+    # Write the constant voltage section
+    writer.writerow(['#Constant Voltage'])
+    writer.writerow(['VG', output_char_data['Vg_src'][0]])  # First value of Vg_src
+    writer.writerow(['VS', '0'])  # VS set to 0
+
+    # Write the data header
+    writer.writerow(['#Data'])
+    writer.writerow(['VD', 'ID'])
+
+    # Write the data rows as one block, using the csv writer's \r\n line ending
+    csv_buffer.write(''.join(f"{vd},{id_val}\r\n" for vd, id_val in zip(Vd_str, Id_str)))
+
+    with open(mystic_csv_path, 'w', newline='') as csvfile:
+        csvfile.write(csv_buffer.getvalue())
+
+    # Saving 4 columns again, in the np.savetxt layout, from the same strings
+    with open(csv_path, 'w') as f:
+        f.write('Vd_src, Vg_src, Id, Ig\n'
+                + ''.join(f"{vd},{vg},{id_val},{ig}\n" for vd, vg, id_val, ig in zip(Vd_str, Vg_str, Id_str, Ig_str)))
+
+    # Binary archive of the same sweep; float32 is well below the measurement noise floor.
+    # Load with np.load(path) and index columns by name, e.g. data['Id']
+    np.save(npy_path, output_char_data.astype(sweep_dtype_f32))
+
+
 # -----------------------------------------------------------------------------------------------------------------------
 #                                              MAIN MEASUREMENT SCRIPT
 # -----------------------------------------------------------------------------------------------------------------------
@@ -485,7 +678,8 @@ configure_instr(0,
                 disable_front_panel=disable_front_panel,
                 curr_range_hard_set = False,
                 current_range = 0.5,
-                non_SCPI_curr_range=non_SCPI_curr_range
+                non_SCPI_curr_range=non_SCPI_curr_range,
+                source_delay=settle_delay
                 )
 
 configure_instr(0,
@@ -494,7 +688,8 @@ configure_instr(0,
                 ascii_command_flavor='non-SCPI',
                 wire_mode=gate_instr_wire_mode,
                 disable_front_panel=disable_front_panel,
-                non_SCPI_curr_range=10)
+                non_SCPI_curr_range=10,
+                source_delay=settle_delay)
 
 transistor_key='pmos_FET_len_8_wid_0.84'# a name for the data saving folder. needs to have nmos or pmos in name
 
@@ -518,15 +713,17 @@ bias_instructions = load_bias_instructions(fet_type, bias_json_file)
 flavor_index = {"LV": 0}[flavor]
 
 
-# Extract relevant bias sets
-gate_source_voltages_transfer_char = bias_instructions[0][1][flavor_index]
-drain_source_voltages_transfer_char = bias_instructions[0][0][flavor_index]
+# Extract relevant bias sets; each set is (Vd, Vg)
+transfer_char_set, output_char_set = bias_instructions
+gate_source_voltages_transfer_char = transfer_char_set[1][flavor_index]
+drain_source_voltages_transfer_char = transfer_char_set[0][flavor_index]
 
-drain_source_voltages_output_char = bias_instructions[1][0][flavor_index]
-gate_source_voltages_output_char = bias_instructions[1][1][flavor_index]
+drain_source_voltages_output_char = output_char_set[0][flavor_index]
+gate_source_voltages_output_char = output_char_set[1][flavor_index]
 
 start_time = time.time()
-os.makedirs(f'{data_folder}/{flavor}/{transistor_key}', exist_ok=True)
+transistor_dir = os.path.join(data_folder, flavor, transistor_key)
+os.makedirs(transistor_dir, exist_ok=True)
 
 # ##############################   Transfer Char (Set 1)   #############################
 # configure_instr(0,
@@ -579,9 +776,9 @@ os.makedirs(f'{data_folder}/{flavor}/{transistor_key}', exist_ok=True)
 #     # Ensure the directory exists
 #     os.makedirs(os.path.dirname(csv_path), exist_ok=True)
 #     # Extract relevant columns
-#     Vd_src = [row[0] for row in transfer_char_data]
-#     Vg_src = [row[1] for row in transfer_char_data]
-#     Id = [row[2] for row in transfer_char_data]
+#     Vd_src = transfer_char_data['Vd_src']
+#     Vg_src = transfer_char_data['Vg_src']
+#     Id = transfer_char_data['Id']
 #
 #     # Open the CSV file for writing
 #     with open(csv_path, 'w', newline='') as csvfile:
@@ -620,68 +817,57 @@ configure_instr(0,
                 disable_front_panel=disable_front_panel,
                 curr_range_hard_set = False,
                 current_range = 0.5,
-                non_SCPI_curr_range=7
+                non_SCPI_curr_range=7,
+                source_delay=settle_delay
                 ) #reconfigure to a big range for output characteristics, incase its a small range from transfers still
-for gate_source_voltage in gate_source_voltages_output_char:
-    output_char_data = voltage_sweep_three_instruments(
-        fixed='Vg',
-        variable='Vd',
-        sweep_voltages=drain_source_voltages_output_char,
-        fixed_voltage=gate_source_voltage,
-        drain_source_instr=drain_source_instrum,
-        gate_source_instr=gate_source_instrum,
-        live_plot=live_plotting,
-        curr_compliance=curr_compliance,
-        drain_curr_range=drain_curr_range,
-        settle_delay=settle_delay,
-        non_SCPI_curr_range=non_SCPI_curr_range,
-        manual_ranging=False
-    )
 
-    gate_source_voltage_str = str(gate_source_voltage).replace('.', 'p')
-
-    # Define the CSV file path
-    csv_filename = f'idvd_Vg{gate_source_voltage_str}.csv'
-    csv_path = os.path.join(data_folder, flavor, transistor_key, 'mystic_format', csv_filename)
-
-    # Ensure the directory exists
-    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-    # Extract relevant columns
-    Vd_src = [row[0] for row in output_char_data]
-    Vg_src = [row[1] for row in output_char_data]
-    Id = [row[2] for row in output_char_data]
-
-    # Open the CSV file for writing
-    with open(csv_path, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-
-        # Write the constant voltage section
-        writer.writerow(['#Constant Voltage'])
-        writer.writerow(['VG', Vg_src[0]])  # First value of Vd_src
-        writer.writerow(['VS', '0'])  # VS set to 0
-
-        # Write the data header
-        writer.writerow(['#Data'])
-        writer.writerow(['VD', 'ID'])
-
-        # Write the data rows
-        for vd, id_val in zip(Vd_src, Id):
-            writer.writerow([vd, id_val])
-
-    # Saving 4 columns again
-    np.savetxt(
-        f'{data_folder}/{flavor}/{transistor_key}/idvd_Vg{gate_source_voltage_str}.csv',
-        output_char_data,
-        delimiter=',',
-        header='Vd_src, Vg_src, Id, Ig',
-        comments=''
-    )
+# The mystic-format directory is the same for every gate voltage, so create it once
+mystic_dir = os.path.join(transistor_dir, 'mystic_format')
+os.makedirs(mystic_dir, exist_ok=True)
+
+# Files are written by one background thread while the next sweep runs; a single
+# worker keeps the saves in order
+save_futures = []
+with ThreadPoolExecutor(max_workers=1) as save_executor:
+    for gate_source_voltage in gate_source_voltages_output_char:
+        output_char_data = voltage_sweep_three_instruments(
+            fixed='Vg',
+            variable='Vd',
+            sweep_voltages=drain_source_voltages_output_char,
+            fixed_voltage=gate_source_voltage,
+            drain_source_instr=drain_source_instrum,
+            gate_source_instr=gate_source_instrum,
+            live_plot=live_plotting,
+            curr_compliance=curr_compliance,
+            drain_curr_range=drain_curr_range,
+            settle_delay=settle_delay,
+            non_SCPI_curr_range=non_SCPI_curr_range,
+            manual_ranging=False
+        )
+
+        gate_source_voltage_str = str(gate_source_voltage).replace('.', 'p')
+
+        # Define the CSV file paths
+        csv_filename = f'idvd_Vg{gate_source_voltage_str}.csv'
+        save_futures.append(save_executor.submit(
+            save_output_char_data,
+            output_char_data,
+            os.path.join(mystic_dir, csv_filename),
+            os.path.join(transistor_dir, csv_filename),
+            os.path.join(transistor_dir, csv_filename.replace('.csv', '.npy'))
+        ))
+
+# Surface any error raised while saving
+for save_future in save_futures:
+    save_future.result()
 
 
 
 #be sure all voltages are set to zero
-set_voltage(0, gate_source_instrum, ascii_command_flavor = 'non-SCPI')
-set_voltage(0, drain_source_instrum, ascii_command_flavor = 'non-SCPI')
+# the SMUs are separate instruments, so zero them concurrently
+shutdown_instrums = [gate_source_instrum, drain_source_instrum]
+with ThreadPoolExecutor(len(shutdown_instrums)) as executor:
+    list(executor.map(lambda instr: set_voltage(0, instr, ascii_command_flavor='non-SCPI'), shutdown_instrums))
 
 end_time = time.time()
 elapsed_time = end_time - start_time
@@ -20,10 +20,18 @@ drain_source_instrum.timeout = 5000
 # 1) Reset and set all SMUs to 0 V, then turn outputs OFF.
 #---------------------------------------------------------------------------------
 
-# Keithley 2410 & 2400 (SCPI)
+def shut_down(instr):
+    """Sets one SMU to 0 V and turns its output off; errors are reported, not raised."""
+    try:
+        instr.write(f'B0,0,0X')     # Set source to 0 V
+        instr.write("N0X")       # Turn output off
+    except Exception as e:
+        print(f"Failed to shut down {instr.resource_name}. Error: {e}")
+
+# Keithley 236/237 (non-SCPI). Both SMUs share one GPIB bus, so they are shut down
+# in order; a write that fails or times out is reported and the next SMU is still zeroed
 for instr in [drain_source_instrum, gate_source_instrum]:
-    instr.write(f'B0,0,0X')     # Set source to 0 V
-    instr.write("N0X")       # Turn output off
+    shut_down(instr)
 
 print("\nAll SMU voltages set to 0 V, outputs turned off.")
 print("All MUX channels opened (disconnected).")
@@ -1,9 +1,22 @@
 import glob
 import os
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # figures are only saved to files, never shown
 import matplotlib.pyplot as plt
+from matplotlib.colors import to_rgba_array
+from matplotlib.lines import Line2D
 import re
 import json
+from collections import namedtuple
+from functools import lru_cache
+
+# Every figure is saved and closed, never displayed: keep pyplot non-interactive,
+# silence the many-open-figures warning, and let Agg split very long paths
+plt.ioff()
+plt.rcParams['figure.max_open_warning'] = 0
+plt.rcParams['agg.path.chunksize'] = 10000
 
 
 flavor = "LV"
@@ -15,20 +28,42 @@ vg_pattern = re.compile(r'Vg([0-9e\-\+p]+)')
 vb_pattern = re.compile(r'Vb([0-9e\-\+p]+)')
 vsub_pattern = re.compile(r'Vsub([0-9e\-\+p]+)')
 
+# Columns of the 4-column CSVs written by 02_take_measurements.py
+data_columns = ('Vd_src', 'Vg_src', 'Id', 'Ig')
+# Column indices into the arrays returned by read_array
+vd_col, vg_col, id_col, ig_col = 0, 1, 2, 3
+
+# Biases parsed from one filename; missing or unparsable values are None.
+Bias = namedtuple('Bias', 'name vd vg vb vsub')
+
 
-def read_data(csv_path):
-    """Read the CSV file into a DataFrame with consistent column names."""
-    df = pd.read_csv(csv_path, header=None)
-    df.columns = [
-        'Vd_src', 'Vg_src',
-        'Id', 'Ig'
-    ]
-    numeric_cols = [
-        'Vd_src', 'Vg_src',
-        'Id', 'Ig'
-    ]
-    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
-    return df
+@lru_cache(maxsize=256)
+def read_array_cached(csv_path, mtime_ns):
+    """
+    Read the CSV file into a (rows, 4) float64 array, columns in data_columns order.
+    Columns are parsed straight to float64 by the CSV reader, replacing the
+    header line the measurement script writes; a file with non-numeric
+    entries falls back to a coercing read, where those entries become NaN.
+    The array is shared between cache hits, so it is read-only.
+    """
+    try:
+        df = pd.read_csv(csv_path, header=0, names=data_columns, dtype=np.float64,
+                         engine='c', memory_map=True, na_filter=False)
+    except ValueError:
+        df = pd.read_csv(csv_path, header=0, names=data_columns)
+        df = df.apply(pd.to_numeric, errors='coerce')
+    data = df.to_numpy(dtype=np.float64)
+    data.flags.writeable = False
+    return data
+
+
+def read_array(csv_path):
+    """
+    Return the data array for csv_path, parsing the file only if it is new or
+    has changed since it was last read. Index columns with vd_col, vg_col, etc.
+    Use read_array_cached.cache_clear() to drop every cached array.
+    """
+    return read_array_cached(os.path.abspath(csv_path), os.stat(csv_path).st_mtime_ns)
 
 
 def ensure_dir(path):
@@ -37,29 +72,57 @@ def ensure_dir(path):
     return path
 
 
-def is_vb_zero(filename, transistor_type=None):
+def parse_float(match):
+    """Convert a bias regex match (e.g. "-1p5") to a float, or None."""
+    if not match:
+        return None
+    try:
+        return float(match.group(1).replace('p', '.'))
+    except ValueError:
+        return None
+
+
+def parse_bias(basename):
+    """Parse all four biases out of a file's basename in one pass."""
+    return Bias(basename,
+                parse_float(vd_pattern.search(basename)),
+                parse_float(vg_pattern.search(basename)),
+                parse_float(vb_pattern.search(basename)),
+                parse_float(vsub_pattern.search(basename)))
+
+
+def bias_label(value, default="?"):
+    """Format a parsed bias value for a plot label."""
+    return default if value is None else f"{value:g}"
+
+
+def is_vb_zero(bias, transistor_type=None):
     """
-    Return True if the filename indicates that Vbulk_source is zero.
+    Return True if the parsed filename biases indicate that Vbulk_source is zero.
     For PFETs the function checks if the filename contains "Vb0_forward_vs_backward"
     (so that names like "Vbopo" are treated as nonzero).
-    For NFETs (or if transistor_type is not "pfet"), the numeric extraction is used.
+    For NFETs (or if transistor_type is not "pfet"), the parsed Vb value is used.
     """
-    basename = os.path.basename(filename)
     if transistor_type and transistor_type.lower() == "pfet":
-        if "Vb0_forward_vs_backward" in basename:
-            return True
-        else:
-            return False
-    else:
-        vb_match = vb_pattern.search(basename)
-        if not vb_match:
-            return False
-        vb_str = vb_match.group(1).replace('p', '.')
-        try:
-            vb_float = float(vb_str)
-            return abs(vb_float) < 1e-14
-        except ValueError:
-            return False
+        return "Vb0_forward_vs_backward" in bias.name
+    return bias.vb is not None and abs(bias.vb) < 1e-14
+
+def scatter_grouped(ax, x, y, lens, labels, sizes=10):
+    """
+    Draw the concatenated points of several files as one scatter collection.
+    Each file keeps its own color (from the axes color cycle) and marker size,
+    and gets a proxy legend entry, so the plot matches one scatter per file.
+    """
+    n_files = len(lens)
+    cycle_colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    file_colors = to_rgba_array([cycle_colors[i % len(cycle_colors)] for i in range(n_files)])
+    file_sizes = np.broadcast_to(np.asarray(sizes, dtype=float), (n_files,))
+
+    ax.scatter(x, y, s=np.repeat(file_sizes, lens), c=np.repeat(file_colors, lens, axis=0))
+    ax.legend(handles=[Line2D([], [], linestyle='', marker='o', markersize=np.sqrt(size),
+                              color=color, label=label)
+                       for color, size, label in zip(file_colors, file_sizes, labels)])
+
 
 def plot_transfer_grouped_by_terminal(idvg_files, out_dir, label_for_title="Nonzero bias", transistor_type="pfet"):
 
@@ -77,34 +140,40 @@ def plot_transfer_grouped_by_terminal(idvg_files, out_dir, label_for_title="Nonz
     fig_drain_log, ax_drain_log = plt.subplots()
     fig_gate_log, ax_gate_log = plt.subplots()
 
-    for fpath in idvg_files:
-        df = read_data(fpath)
-        # grabbing Vds bias
-        vd_match = vd_pattern.search(os.path.basename(fpath))
-        vd_str = vd_match.group(1).replace('p', '.') if vd_match else "?"
+    # Parse each filename's biases once, before any plotting
+    metas = [(fpath, parse_bias(os.path.basename(fpath))) for fpath in idvg_files]
+    is_nfet = transistor_type.lower() == "nfet"
+
+    # Collect every file's columns, then draw each axis with a single scatter call
+    vg_list, id_list, ig_list, labels = [], [], [], []
+    for fpath, bias in metas:
+        data = read_array(fpath)
         # Create a label based on the bias value (Vsub for NFET, Vbulk for PFET)
-        if transistor_type.lower() == "nfet":
-            vsub_match = vsub_pattern.search(os.path.basename(fpath))
-            bias_val_str = vsub_match.group(1).replace('p', '.') if vsub_match else "?"
-            label_str = f"Vsub_source={bias_val_str} V"
+        if is_nfet:
+            labels.append(f"Vsub_source={bias_label(bias.vsub)} V")
         else:
-            vb_match = vb_pattern.search(os.path.basename(fpath))
-            bias_val_str = vb_match.group(1).replace('p', '.') if vb_match else "?"
-            label_str = f"Vds={vd_str} Vbs={bias_val_str}"
+            labels.append(f"Vds={bias_label(bias.vd)} Vbs={bias_label(bias.vb)}")
+        vg_list.append(data[:, vg_col])
+        id_list.append(data[:, id_col])
+        ig_list.append(data[:, ig_col])
+
+    lens = [len(vg) for vg in vg_list]
+    vg_all = np.concatenate(vg_list)
+    id_all = np.concatenate(id_list)
+    ig_all = np.concatenate(ig_list)
 
-        # Linear-scale transfer curves (Vg_src vs current)
-        ax_drain_lin.scatter(df['Vg_src'], df['Id'], s=10, label=label_str)
-        ax_gate_lin.scatter(df['Vg_src'], df['Ig'], s=10, label=label_str)
+    # Linear-scale transfer curves (Vg_src vs current)
+    scatter_grouped(ax_drain_lin, vg_all, id_all, lens, labels)
+    scatter_grouped(ax_gate_lin, vg_all, ig_all, lens, labels)
 
-        # Log-scale plots (using absolute values)
-        ax_drain_log.scatter(df['Vg_src'], abs(df['Id']), s=10, label=label_str)
-        ax_gate_log.scatter(df['Vg_src'], abs(df['Ig']), s=10, label=label_str)
+    # Log-scale plots (using absolute values)
+    scatter_grouped(ax_drain_log, vg_all, np.abs(id_all), lens, labels)
+    scatter_grouped(ax_gate_log, vg_all, np.abs(ig_all), lens, labels)
 
     # Configure and save linear-scale plots
     ax_drain_lin.set_xlabel("V_gate_source (V)")
     ax_drain_lin.set_ylabel("Drain_Source I (A)")
     ax_drain_lin.set_title(f"Transfer Characteristics (Drain, lin) {label_for_title}")
-    ax_drain_lin.legend()
     ax_drain_lin.grid(True)
     fig_drain_lin.tight_layout()
     fig_drain_lin.savefig(os.path.join(transfer_lin_dir, "transfer_drain_lin_grouped.png"))
@@ -113,7 +182,6 @@ def plot_transfer_grouped_by_terminal(idvg_files, out_dir, label_for_title="Nonz
     ax_gate_lin.set_xlabel("V_gate_source (V)")
     ax_gate_lin.set_ylabel("Gate_Source I (A)")
     ax_gate_lin.set_title(f"Transfer Characteristics (Gate, lin) {label_for_title}")
-    ax_gate_lin.legend()
     ax_gate_lin.grid(True)
     fig_gate_lin.tight_layout()
     fig_gate_lin.savefig(os.path.join(transfer_lin_dir, "transfer_gate_lin_grouped.png"))
@@ -124,7 +192,6 @@ def plot_transfer_grouped_by_terminal(idvg_files, out_dir, label_for_title="Nonz
     ax_drain_log.set_ylabel("Drain_Source I (A) [log]")
     ax_drain_log.set_title(f"Transfer Characteristics (Drain, log) {label_for_title}")
     ax_drain_log.set_yscale("log")
-    ax_drain_log.legend()
     ax_drain_log.grid(True)
     fig_drain_log.tight_layout()
     fig_drain_log.savefig(os.path.join(transfer_log_dir, "transfer_drain_log_grouped.png"))
@@ -134,7 +201,6 @@ def plot_transfer_grouped_by_terminal(idvg_files, out_dir, label_for_title="Nonz
     ax_gate_log.set_ylabel("Gate_Source I (A) [log]")
     ax_gate_log.set_title(f"Transfer Characteristics (Gate, log) {label_for_title}")
     ax_gate_log.set_yscale("log")
-    ax_gate_log.legend()
     ax_gate_log.grid(True)
     fig_gate_log.tight_layout()
     fig_gate_log.savefig(os.path.join(transfer_log_dir, "transfer_gate_log_grouped.png"))
@@ -157,25 +223,30 @@ def plot_output_grouped_by_terminal(idvd_files, out_dir, label_for_title="Nonzer
     fig_drain, ax_drain = plt.subplots()
     fig_gate, ax_gate = plt.subplots()
 
-    for fpath in idvd_files:
+    metas = [(fpath, parse_bias(os.path.basename(fpath))) for fpath in idvd_files]
+
+    vd_list, id_list, ig_list, labels, sizes = [], [], [], [], []
+    for fpath, bias in metas:
         if "paused" in fpath:
             s=40
         else:
             s=10 #default
-        df = read_data(fpath)
-        basename = os.path.basename(fpath)
+        data = read_array(fpath)
         # Use Vg for the label (you might change this as desired)
-        vg_match = vg_pattern.search(basename)
-        vg_str = vg_match.group(1).replace('p', '.') if vg_match else "?"
-        label_str = f"Vgs={vg_str} V"
+        labels.append(f"Vgs={bias_label(bias.vg)} V")
+        sizes.append(s)
+        vd_list.append(data[:, vd_col])
+        id_list.append(data[:, id_col])
+        ig_list.append(data[:, ig_col])
 
-        ax_drain.scatter(df['Vd_src'], df['Id'], s=s, label=label_str)
-        ax_gate.scatter(df['Vd_src'], df['Ig'], s=s, label=label_str)
+    lens = [len(vd) for vd in vd_list]
+    vd_all = np.concatenate(vd_list)
+    scatter_grouped(ax_drain, vd_all, np.concatenate(id_list), lens, labels, sizes)
+    scatter_grouped(ax_gate, vd_all, np.concatenate(ig_list), lens, labels, sizes)
 
     ax_drain.set_xlabel("V_d_source (V)")
     ax_drain.set_ylabel("Drain Current I (A)")
     ax_drain.set_title(f"Output Characteristics (Drain) {label_for_title}")
-    ax_drain.legend()
     ax_drain.grid(True)
     fig_drain.tight_layout()
     fig_drain.savefig(os.path.join(output_dir, "output_drain_grouped.png"))
@@ -184,7 +255,6 @@ def plot_output_grouped_by_terminal(idvd_files, out_dir, label_for_title="Nonzer
     ax_gate.set_xlabel("V_d_source (V)")
     ax_gate.set_ylabel("Gate Current I (A)")
     ax_gate.set_title(f"Output Characteristics (Gate) {label_for_title}")
-    ax_gate.legend()
     ax_gate.grid(True)
     fig_gate.tight_layout()
     fig_gate.savefig(os.path.join(output_dir, "output_gate_grouped.png"))
@@ -201,7 +271,10 @@ def plot_transfer_vb0(idvg_files, out_dir, label_for_title="Vsource=0"):
     fig_drain_log, ax_drain_log = plt.subplots()
     fig_gate_log, ax_gate_log = plt.subplots()
 
-    for fpath in idvg_files:
+    metas = [(fpath, parse_bias(os.path.basename(fpath))) for fpath in idvg_files]
+
+    vg_list, id_list, ig_list, labels = [], [], [], []
+    for fpath, bias in metas:
         if "range5" in fpath:
             extra_label= ", Range 5 (10uA)"
         elif "range6." in fpath:
@@ -214,24 +287,27 @@ def plot_transfer_vb0(idvg_files, out_dir, label_for_title="Vsource=0"):
             extra_label=", Range 6 (100uA) (not changing range)"
         else:
             extra_label=""
-        df = read_data(fpath)
-        basename = os.path.basename(fpath)
-        vd_match = vd_pattern.search(basename)
-        vd_str = vd_match.group(1).replace('p', '.') if vd_match else "0"
-        vsub_match = vsub_pattern.search(basename)
-        vsub_str = vsub_match.group(1).replace('p', '.') if vsub_match else "?"
-        label_str = f"Vd={vd_str} V"
+        data = read_array(fpath)
+        labels.append(f"Vd={bias_label(bias.vd, '0')} V{extra_label}")
+        vg_list.append(data[:, vg_col])
+        id_list.append(data[:, id_col])
+        ig_list.append(data[:, ig_col])
+
+    lens = [len(vg) for vg in vg_list]
+    vg_all = np.concatenate(vg_list)
+    id_all = np.concatenate(id_list)
+    ig_all = np.concatenate(ig_list)
 
-        ax_drain_lin.scatter(df['Vg_src'], df['Id'], s=10, label=f"{label_str}{extra_label}")
-        ax_gate_lin.scatter(df['Vg_src'], df['Ig'], s=10, label=f"{label_str}{extra_label}")
+    scatter_grouped(ax_drain_lin, vg_all, id_all, lens, labels)
+    scatter_grouped(ax_gate_lin, vg_all, ig_all, lens, labels)
 
-        ax_drain_log.scatter(abs(df['Vg_src']), abs(df['Id']), s=10, label=f"{label_str}{extra_label}")
-        ax_gate_log.scatter(abs(df['Vg_src']), abs(df['Ig']), s=10, label=f"{label_str}{extra_label}")
+    vg_abs = np.abs(vg_all)
+    scatter_grouped(ax_drain_log, vg_abs, np.abs(id_all), lens, labels)
+    scatter_grouped(ax_gate_log, vg_abs, np.abs(ig_all), lens, labels)
 
     ax_drain_lin.set_xlabel("V_gate_source (V)")
     ax_drain_lin.set_ylabel("Drain_Source I (A)")
     ax_drain_lin.set_title(f"Transfer (Drain, lin) {label_for_title}")
-    ax_drain_lin.legend()
     ax_drain_lin.grid(True)
     fig_drain_lin.tight_layout()
     fig_drain_lin.savefig(os.path.join(out_dir, "transfer_drain_lin_grouped.png"))
@@ -240,7 +316,6 @@ def plot_transfer_vb0(idvg_files, out_dir, label_for_title="Vsource=0"):
     ax_gate_lin.set_xlabel("V_gate_source (V)")
     ax_gate_lin.set_ylabel("Gate_Source I (A)")
     ax_gate_lin.set_title(f"Transfer (Gate, lin) {label_for_title}")
-    ax_gate_lin.legend()
     ax_gate_lin.grid(True)
     fig_gate_lin.tight_layout()
     fig_gate_lin.savefig(os.path.join(out_dir, "transfer_gate_lin_grouped.png"))
@@ -251,7 +326,6 @@ def plot_transfer_vb0(idvg_files, out_dir, label_for_title="Vsource=0"):
     ax_drain_log.set_title(f"Transfer (Drain, log) {label_for_title}")
     #ax_drain_log.set_ylim(0, 1e-6)
     ax_drain_log.set_yscale("log")
-    ax_drain_log.legend()
     ax_drain_log.grid(True)
     fig_drain_log.tight_layout()
     fig_drain_log.savefig(os.path.join(out_dir, "transfer_drain_log_grouped.png"))
@@ -261,7 +335,6 @@ def plot_transfer_vb0(idvg_files, out_dir, label_for_title="Vsource=0"):
     ax_gate_log.set_ylabel("Gate_Source I (A) [log]")
     ax_gate_log.set_title(f"Transfer (Gate, log) {label_for_title}")
     ax_gate_log.set_yscale("log")
-    ax_gate_log.legend()
     ax_gate_log.grid(True)
     fig_gate_log.tight_layout()
     fig_gate_log.savefig(os.path.join(out_dir, "transfer_gate_log_grouped.png"))
@@ -286,8 +359,14 @@ else:
 
 all_csv_files = glob.glob(f"{data_folder}/160K_bonding_diagram_1_05-20-2025/{flavor}/{transistor_key}/*.csv")
 
-idvg_files = [f for f in all_csv_files if 'idvg' in os.path.basename(f).lower()]
-idvd_files = [f for f in all_csv_files if 'idvd' in os.path.basename(f).lower()]
+# Split the files by measurement type in one pass
+idvg_files, idvd_files = [], []
+for f in all_csv_files:
+    basename = os.path.basename(f).lower()
+    if 'idvg' in basename:
+        idvg_files.append(f)
+    if 'idvd' in basename:
+        idvd_files.append(f)
 
 vb0_out_dir = ensure_dir(os.path.join(base_out_dir, "Vs0"))
 plot_transfer_vb0(idvg_files, vb0_out_dir, label_for_title=f"{transistor_key} @ 160K")
@@ -2,11 +2,22 @@ import glob
 import os
 import re
 import json
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # figures are only saved to files; also safe in worker processes
 import matplotlib.pyplot as plt
-from functools import lru_cache
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor
+from collections import defaultdict
 import matplotlib.gridspec as gridspec
 
+# Non-interactive pyplot; figures are closed after saving, so the open-figure
+# warning is not needed
+plt.ioff()
+plt.rcParams['figure.max_open_warning'] = 0
+plt.rcParams['agg.path.chunksize'] = 10000
+
 
 # =============================================================================
 # Helper Functions and Constants
@@ -25,6 +36,16 @@ vg_pattern = re.compile(r'Vg([0-9e\-\+p]+)')
 vb_pattern = re.compile(r'Vb([0-9e\-\+p]+)')
 vsub_pattern = re.compile(r'Vsub([0-9e\-\+p]+)')
 
+# Columns of the 15-column measurement CSVs.
+data_columns = (
+    'Vd_src', 'Vg_src', 'Vb_src', 'Vsub_src',
+    'Id', 'Ib', 'Isub', 'Ig',
+    'Vd_meas', 'Vb_meas', 'Vsub_meas', 'Vg_meas',
+    'TempA', 'TempB', 'Elapsed_time'
+)
+# Columns the plots use; the source biases are never plotted, so they are skipped when reading
+plot_columns = tuple(col for col in data_columns if col not in ('Vb_src', 'Vsub_src'))
+
 
 # --- New bias-zero functions for PFETs and NFETs ---
 def is_vb_zero_pfet(filename):
@@ -107,8 +128,8 @@ def get_vb_info(files):
     return None
 
 
-@lru_cache(maxsize=None)
-def read_data(csv_path):
+@lru_cache(maxsize=256)
+def read_data_cached(csv_path, mtime_ns):
     """
     Read the CSV file into a pandas DataFrame and assign column names.
     The CSV files now contain 15 columns:
@@ -117,22 +138,24 @@ def read_data(csv_path):
       Vd_meas, Vb_meas, Vsub_meas, Vg_meas,
       TempA, TempB, Elapsed_time
     Caching is used to avoid re‐reading the same file multiple times.
+    Columns are parsed straight to float64; a file with non-numeric entries
+    falls back to a coercing read, where those entries become NaN.
     """
-    df = pd.read_csv(csv_path, header=None)
-    df.columns = [
-        'Vd_src', 'Vg_src', 'Vb_src', 'Vsub_src',
-        'Id', 'Ib', 'Isub', 'Ig',
-        'Vd_meas', 'Vb_meas', 'Vsub_meas', 'Vg_meas',
-        'TempA', 'TempB', 'Elapsed_time'
-    ]
-    numeric_columns = [
-        'Vd_src', 'Vg_src', 'Vb_src', 'Vsub_src',
-        'Id', 'Ib', 'Isub', 'Ig',
-        'Vd_meas', 'Vb_meas', 'Vsub_meas', 'Vg_meas',
-        'TempA', 'TempB', 'Elapsed_time'
-    ]
-    df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors='coerce')
-    return df
+    try:
+        return pd.read_csv(csv_path, header=None, names=data_columns, usecols=plot_columns,
+                           dtype=np.float64, engine='c', memory_map=True, na_filter=False)
+    except ValueError:
+        df = pd.read_csv(csv_path, header=None, names=data_columns, usecols=plot_columns)
+        return df.apply(pd.to_numeric, errors='coerce')
+
+
+def read_data(csv_path):
+    """
+    Return the DataFrame for csv_path, parsing the file only if it is new or has
+    changed since it was last read. The result is a shallow copy of the cached frame;
+    read_data_cached.cache_clear() drops every cached frame.
+    """
+    return read_data_cached(os.path.abspath(csv_path), os.stat(csv_path).st_mtime_ns).copy(deep=False)
 
 
 # =============================================================================
@@ -164,8 +187,9 @@ def plot_scatter(files, x_key, y_keys, x_label, y_labels, title, save_path,
         for f in files:
             df = read_data(f)
             label = label_extractor(f)
+            x = df[x_key].to_numpy()
             for i, y_key in enumerate(y_keys):
-                axs[i].scatter(df[x_key], transforms[i](df[y_key]), s=10, label=label)
+                axs[i].scatter(x, transforms[i](df[y_key].to_numpy()), s=10, label=label)
 
         for ax, ylabel, scale in zip(axs, y_labels, y_scales):
             ax.set_ylabel(ylabel)
@@ -218,6 +242,7 @@ def plot_scatter(files, x_key, y_keys, x_label, y_labels, title, save_path,
                 s = 40
             else:
                 s = 10  # default
+            extra_label = ""
             # if "Test2" in f:
             #     extra_label = f" keeping Vgs=-25V, Vs-sub=25V"
             # elif "Test1" in f:
@@ -226,8 +251,9 @@ def plot_scatter(files, x_key, y_keys, x_label, y_labels, title, save_path,
             #     extra_label = ""
             df = read_data(f)
             label = label_extractor(f, extra_label)
+            x = df[x_key].to_numpy()
             for i, key in enumerate(main_y_keys):
-                axs_main[i].scatter(df[x_key], main_transforms[i](df[key]), s=s, label=label)
+                axs_main[i].scatter(x, main_transforms[i](df[key].to_numpy()), s=s, label=label)
         for ax, ylabel, scale in zip(axs_main, main_y_labels, main_y_scales):
             ax.set_ylabel(ylabel)
             ax.grid(True)
@@ -241,7 +267,7 @@ def plot_scatter(files, x_key, y_keys, x_label, y_labels, title, save_path,
             for f in files:
                 df = read_data(f)
                 label = label_extractor(f)
-                axs_temp[j].scatter(df['Elapsed_time'], df[temp_key], s=10, label=label)
+                axs_temp[j].scatter(df['Elapsed_time'].to_numpy(), df[temp_key].to_numpy(), s=10, label=label)
             axs_temp[j].set_ylabel(temp_label)
             axs_temp[j].grid(True)
         axs_temp[-1].set_xlabel("Elapsed Time (s)")
@@ -305,7 +331,7 @@ def plot_transfer_vb0(files, out_dir, vb_label="Vbulk_source=0", extra_title_inf
         title=f"Transfer (Drain Log) - {vb_label}{title_suffix}{extra_info}",
         save_path=save_path,
         label_extractor=label_extractor,
-        transforms=[abs, lambda x: x, lambda x: x, lambda x: x],
+        transforms=[np.abs, lambda x: x, lambda x: x, lambda x: x],
         y_scales=['log', None, None, None],
         temp_plot=True
     )
@@ -387,7 +413,7 @@ def plot_transfer_vds_grouped_by_bias(files, out_dir, group_by='Vsub', extra_tit
             title=f"Transfer (Log) @20K for Vds={vd_val} {extra_title}",
             save_path=save_path,
             label_extractor=label_extractor,
-            transforms=[abs, lambda x: x, lambda x: x, lambda x: x],
+            transforms=[np.abs, lambda x: x, lambda x: x, lambda x: x],
             y_scales=['log', None, None, None],
             temp_plot=True
         )
@@ -449,7 +475,7 @@ def plot_output(files, out_dir, vb_label="Vbulk_source=?", extra_title_info_func
         title=f"Output (Drain Log) - {vb_label}{title_suffix}{extra_info}",
         save_path=save_path,
         label_extractor=label_extractor,
-        transforms=[abs, lambda x: x, lambda x: x, lambda x: x],
+        transforms=[np.abs, lambda x: x, lambda x: x, lambda x: x],
         y_scales=['log', None, None, None],
         temp_plot=True
     )
@@ -471,35 +497,16 @@ def plot_output(files, out_dir, vb_label="Vbulk_source=?", extra_title_info_func
 
 
 # =============================================================================
-# Main Routine
+# Per-Transistor Processing
 # =============================================================================
-flavor = "250K0_high_Vds_tests/HV"
-data_folder = 'Data'
-
-# Create main output directories.
-base_plot_dir = os.path.join('plot_correlations')
-os.makedirs(base_plot_dir, exist_ok=True)
-flavor_dir = os.path.join(base_plot_dir, flavor)
-os.makedirs(flavor_dir, exist_ok=True)
-
-mux_json_file = "mux_instructions_by_transistor_4wire_drain.json"
-mux_data = load_mux_instructions(mux_json_file)
-
-for transistor_key, mux_dict in mux_data.items():
-    # Uncomment the following lines to restrict processing to certain transistors.
-    if 'pmos25_FET1' not in transistor_key:
-         continue
-
+def process_transistor(transistor_key, flavor, data_folder, flavor_dir):
+    """
+    Make the stacked plots for one transistor. Transistors write to separate
+    folders, so several can be processed in parallel worker processes.
+    """
     base_out_dir = os.path.join(flavor_dir, transistor_key)
     os.makedirs(base_out_dir, exist_ok=True)
 
-    # Collect CSV files for this transistor.
-    csv_pattern = os.path.join(data_folder, flavor, transistor_key, "*.csv")
-    all_csv_files = glob.glob(csv_pattern)
-    # Split files based on measurement type.
-    idvg_files = [f for f in all_csv_files if 'idvg' in os.path.basename(f).lower()]
-    idvd_files = [f for f in all_csv_files if 'idvd' in os.path.basename(f).lower()]
-
     # --- Choose bias-zero test based on transistor type ---
     lower_key = transistor_key.lower()
     if any(x in lower_key for x in ['nmos', 'nfet']):
@@ -521,11 +528,20 @@ for transistor_key, mux_dict in mux_data.items():
         bias_label_nonzero = "Vsub≠0"
         group_by = 'Vsub'
 
-    # Split files based on whether the chosen bias parameter is zero.
-    idvg_bias0 = [f for f in idvg_files if bias_zero_func(f)]
-    idvg_biasNon0 = [f for f in idvg_files if not bias_zero_func(f)]
-    idvd_bias0 = [f for f in idvd_files if bias_zero_func(f)]
-    idvd_biasNon0 = [f for f in idvd_files if not bias_zero_func(f)]
+    # Collect CSV files for this transistor and split them by measurement type
+    # and by whether the chosen bias parameter is zero, in a single pass.
+    csv_pattern = os.path.join(data_folder, flavor, transistor_key, "*.csv")
+    file_groups = defaultdict(list)
+    for f in glob.glob(csv_pattern):
+        basename = os.path.basename(f).lower()
+        bias_zero = bias_zero_func(f)
+        for kind in ('idvg', 'idvd'):
+            if kind in basename:
+                file_groups[(kind, bias_zero)].append(f)
+    idvg_bias0 = file_groups[('idvg', True)]
+    idvg_biasNon0 = file_groups[('idvg', False)]
+    idvd_bias0 = file_groups[('idvd', True)]
+    idvd_biasNon0 = file_groups[('idvd', False)]
 
     # Create output subdirectories.
     bias0_out_dir = os.path.join(base_out_dir, "Vb0")
@@ -551,4 +567,30 @@ for transistor_key, mux_dict in mux_data.items():
     #                                  extra_title_info_func=extra_info_func)
     #plot_output(idvd_biasNon0, biasNon0_out_dir, vb_label=bias_label_nonzero, extra_title_info_func=extra_info_func)
 
-print("Done generating plots")
+
+# =============================================================================
+# Main Routine
+# =============================================================================
+if __name__ == "__main__":
+    flavor = "250K0_high_Vds_tests/HV"
+    data_folder = 'Data'
+
+    # Create main output directories.
+    base_plot_dir = os.path.join('plot_correlations')
+    os.makedirs(base_plot_dir, exist_ok=True)
+    flavor_dir = os.path.join(base_plot_dir, flavor)
+    os.makedirs(flavor_dir, exist_ok=True)
+
+    mux_json_file = "mux_instructions_by_transistor_4wire_drain.json"
+    mux_data = load_mux_instructions(mux_json_file)
+
+    # Restrict processing to certain transistors (use list(mux_data) for all of them).
+    transistor_keys = [key for key in mux_data if 'pmos25_FET1' in key]
+
+    # One transistor per worker process (one worker per CPU core by default)
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(partial(process_transistor, flavor=flavor, data_folder=data_folder,
+                                  flavor_dir=flavor_dir),
+                          transistor_keys))
+
+    print("Done generating plots")
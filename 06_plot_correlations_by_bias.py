@@ -2,8 +2,18 @@ import glob
 import os
 import re
 import json
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # figures are only saved to files; also safe in worker processes
 import matplotlib.pyplot as plt
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+# Same rendering settings as 04_plot_results.py
+plt.ioff()
+plt.rcParams['figure.max_open_warning'] = 0
+plt.rcParams['agg.path.chunksize'] = 10000
 
 
 # ---------------------------
@@ -22,20 +32,27 @@ def ensure_dir(path):
     return path
 
 
+# Columns of the 15-column measurement CSVs.
+data_columns = (
+    'Vd_src', 'Vg_src', 'Vb_src', 'Vsub_src',
+    'Id', 'Ib', 'Isub', 'Ig',
+    'Vd_meas', 'Vb_meas', 'Vsub_meas', 'Vg_meas',
+    'TempA', 'TempB', 'Elapsed_time'
+)
+
+
 def read_data(csv_path):
     """
-    Read CSV into a DataFrame with pre-defined column names
-    and convert them to numeric types.
+    Read the columns used by the plot tasks from a CSV into a DataFrame,
+    parsed straight to float64. A file with non-numeric entries falls back to
+    a coercing read, where those entries become NaN.
     """
-    cols = [
-        'Vd_src', 'Vg_src', 'Vb_src', 'Vsub_src',
-        'Id', 'Ib', 'Isub', 'Ig',
-        'Vd_meas', 'Vb_meas', 'Vsub_meas', 'Vg_meas',
-        'TempA', 'TempB', 'Elapsed_time'
-    ]
-    df = pd.read_csv(csv_path, header=None, names=cols)
-    df = df.apply(pd.to_numeric, errors='coerce')
-    return df
+    try:
+        return pd.read_csv(csv_path, header=None, names=data_columns, usecols=plot_columns,
+                           dtype=np.float64, engine='c', memory_map=True, na_filter=False)
+    except ValueError:
+        df = pd.read_csv(csv_path, header=None, names=data_columns, usecols=plot_columns)
+        return df.apply(pd.to_numeric, errors='coerce')
 
 
 def parse_bias(match_obj):
@@ -102,9 +119,11 @@ def process_plot_task(df, task, bias_info, output_dir):
       - bias_info: dictionary of bias values for formatting titles and filenames.
       - output_dir: where to save the generated plot.
     """
-    x_data = df[task['x_col']]
+    x_data = df[task['x_col']].to_numpy()
+    y_data = df[task['y_col']].to_numpy()
     # Use absolute values if specified (for log-scale plots)
-    y_data = df[task['y_col']].abs() if task.get('abs', False) else df[task['y_col']]
+    if task.get('abs', False):
+        y_data = np.abs(y_data)
 
     title = task['title'].format(**bias_info)
     fname = f"{task['prefix']}__{bias_str(bias_info, task['bias_keys'])}.png"
@@ -122,6 +141,13 @@ def process_plot_task(df, task, bias_info, output_dir):
     )
 
 
+# Define regex patterns for bias extraction
+vd_pattern = re.compile(r'Vd([0-9e\-\+p]+)')
+vg_pattern = re.compile(r'Vg([0-9e\-\+p]+)')
+vb_pattern = re.compile(r'Vb([0-9e\-\+p]+)')
+vsub_pattern = re.compile(r'Vsub([0-9e\-\+p]+)')
+
+
 # ---------------------------
 # Plot Task Definitions
 # ---------------------------
@@ -263,38 +289,35 @@ output_voltage_tasks = [
     },
 ]
 
+# Only the columns some plot task uses are parsed from each CSV
+plot_columns = [
+    col for col in data_columns
+    if any(col in (task['x_col'], task['y_col'])
+           for tasks in (transfer_lin_tasks, transfer_log_tasks, transfer_voltage_tasks,
+                         output_lin_tasks, output_log_tasks, output_voltage_tasks)
+           for task in tasks)
+]
+
 # ---------------------------
-# Main Processing Script
+# Per-Transistor Processing
 # ---------------------------
-# Parameters and directories
-flavor = "HV"
-data_folder = 'Data'
-mux_json_file = "mux_instructions_by_transistor_4wire_drain.json"
-mux_data = load_mux_instructions(mux_json_file)
-
-# Define regex patterns for bias extraction
-vd_pattern = re.compile(r'Vd([0-9e\-\+p]+)')
-vg_pattern = re.compile(r'Vg([0-9e\-\+p]+)')
-vb_pattern = re.compile(r'Vb([0-9e\-\+p]+)')
-vsub_pattern = re.compile(r'Vsub([0-9e\-\+p]+)')
-
-# Define output root directory
-output_root = os.path.join('plot_by_bias')
-ensure_dir(output_root)
-ensure_dir(os.path.join(output_root, flavor))
-
-for transistor_key, mux_dict in mux_data.items():
-    # Uncomment the following lines to process only a specific transistor.
-    # if 'pmos25_FET1' not in transistor_key:
-    #     continue
-
+def process_transistor(transistor_key, flavor, data_folder, output_root):
+    """
+    Make all per-file plots for one transistor. Transistors write to separate
+    folders, so several can be processed in parallel worker processes.
+    """
     base_out_dir = ensure_dir(os.path.join(output_root, flavor, transistor_key))
 
     # Collect all CSV files for this transistor
     all_csv_files = glob.glob(os.path.join(data_folder, flavor, transistor_key, "*.csv"))
-    # Separate files based on their name content
-    idvg_files = [f for f in all_csv_files if 'idvg' in os.path.basename(f).lower()]
-    idvd_files = [f for f in all_csv_files if 'idvd' in os.path.basename(f).lower()]
+    # Separate files based on their name content, in one pass
+    idvg_files, idvd_files = [], []
+    for f in all_csv_files:
+        basename = os.path.basename(f).lower()
+        if 'idvg' in basename:
+            idvg_files.append(f)
+        if 'idvd' in basename:
+            idvd_files.append(f)
 
     # Process ID-VG (transfer) files
     if idvg_files:
@@ -341,4 +364,30 @@ for transistor_key, mux_dict in mux_data.items():
             for task in output_voltage_tasks:
                 process_plot_task(df, task, bias_info, output_volt_dir)
 
-print("Done generating separate plots in subfolders.")
+
+# ---------------------------
+# Main Processing Script
+# ---------------------------
+if __name__ == "__main__":
+    # Parameters and directories
+    flavor = "HV"
+    data_folder = 'Data'
+    mux_json_file = "mux_instructions_by_transistor_4wire_drain.json"
+    mux_data = load_mux_instructions(mux_json_file)
+
+    # Define output root directory
+    output_root = os.path.join('plot_by_bias')
+    ensure_dir(output_root)
+    ensure_dir(os.path.join(output_root, flavor))
+
+    transistor_keys = list(mux_data)
+    # Uncomment the following line to process only a specific transistor.
+    # transistor_keys = [key for key in mux_data if 'pmos25_FET1' in key]
+
+    # One transistor per worker process (one worker per CPU core by default)
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(partial(process_transistor, flavor=flavor, data_folder=data_folder,
+                                  output_root=output_root),
+                          transistor_keys))
+
+    print("Done generating separate plots in subfolders.")
@@ -155,8 +155,11 @@ def voltage_sweep_three_instruments(fixed, variable, sweep_voltages, fixed_volta
     configure_instr(0, sweep_v_instr, current_compliance=curr_compliance,
                     ascii_command_flavor='SCPI', wire_mode=sweep_v_instr_wire_mode)  # Start sweep at 0 V
 
-    for v_value in sweep_voltages:
-        sweep_v_instr.write(f":SOUR:VOLT:LEV {v_value}")  # Update sweep voltage
+    # Format every level command once, before the measurement loop
+    level_commands = [f":SOUR:VOLT:LEV {v_value}" for v_value in sweep_voltages]
+
+    for v_value, level_command in zip(sweep_voltages, level_commands):
+        sweep_v_instr.write(level_command)  # Update sweep voltage
 
         # Measure currents
         d_current = measure_current(ds_instr, ascii_command_flavor='SCPI')
@@ -218,29 +221,16 @@ def load_bias_instructions(fet_type = "NMOS"):
     processed_data = load_sweep_bias_instructions_from_json(input_json_path)
 
     # ------grab nmos instructions-----
-    transfer_char_set1 = processed_data.get(fet_type, {}).get('Primary sweep: Vgs Set 1', {})
-    transfer_char_set2 = processed_data.get(fet_type, {}).get('Primary sweep: Vgs Set 2', {})
-    transfer_char = processed_data.get(fet_type, {}).get('Primary sweep: Vds', {})
-
-    transfer_char_set1_vs = transfer_char_set1.get("Vs", [])
-    transfer_char_set1_vb = transfer_char_set1.get("Vb", [])
-    transfer_char_set1_vd = transfer_char_set1.get("Vd", [])
-    transfer_char_set1_vg = transfer_char_set1.get("Vg", [])
-
-    transfer_char_set2_vs = transfer_char_set2.get("Vs", [])
-    transfer_char_set2_vb = transfer_char_set2.get("Vb", [])
-    transfer_char_set2_vd = transfer_char_set2.get("Vd", [])
-    transfer_char_set2_vg = transfer_char_set2.get("Vg", [])
-
-    transfer_char_vs = transfer_char.get("Vs", [])
-    transfer_char_vb = transfer_char.get("Vb", [])
-    transfer_char_vd = transfer_char.get("Vd", [])
-    transfer_char_vg = transfer_char.get("Vg", [])
-
-    return (
-        (transfer_char_set1_vs, transfer_char_set1_vb, transfer_char_set1_vd, transfer_char_set1_vg),
-        (transfer_char_set2_vs, transfer_char_set2_vb, transfer_char_set2_vd, transfer_char_set2_vg),
-        (transfer_char_vs, transfer_char_vb, transfer_char_vd, transfer_char_vg)
+    fet_data = processed_data.get(fet_type, {})
+    bias_keys = ("Vs", "Vb", "Vd", "Vg")
+
+    return tuple(
+        tuple(sweep.get(key, []) for key in bias_keys)
+        for sweep in (
+            fet_data.get('Primary sweep: Vgs Set 1', {}),
+            fet_data.get('Primary sweep: Vgs Set 2', {}),
+            fet_data.get('Primary sweep: Vds', {}),
+        )
     )
     
 
@@ -327,31 +317,32 @@ for transistor_key, mux_dict in mux_data.items():
     except KeyError:
         print("Invalid flavor, please pass LV, MV, or HV")
 
+    # each instruction set is (Vs, Vb, Vd, Vg)
+    set1_instructions, set2_instructions, output_char_instructions = bias_instructions
+
     # transfer char set 1
-    gate_voltages_transfer_char_s1 = bias_instructions[1][3][
-        flavor_index]  # 0 for the first instruction set, 3 for the gate voltage vals, 2 for the HV devices
-    drain_voltages_transfer_char_s1 = bias_instructions[0][2][flavor_index]
-    body_voltages_transfer_char_s1 = bias_instructions[0][1][flavor_index]
+    gate_voltages_transfer_char_s1 = set2_instructions[3][
+        flavor_index]  # 3 for the gate voltage vals, flavor_index 2 for the HV devices
+    drain_voltages_transfer_char_s1 = set1_instructions[2][flavor_index]
+    body_voltages_transfer_char_s1 = set1_instructions[1][flavor_index]
 
     # transfer char set 2
-    gate_voltages_transfer_char_s2 = bias_instructions[1][3][flavor_index]
-    drain_voltages_transfer_char_s2 = bias_instructions[1][2][flavor_index]
-    body_voltages_transfer_char_s2 = bias_instructions[1][1][flavor_index]
+    gate_voltages_transfer_char_s2 = set2_instructions[3][flavor_index]
+    drain_voltages_transfer_char_s2 = set2_instructions[2][flavor_index]
+    body_voltages_transfer_char_s2 = set2_instructions[1][flavor_index]
 
     # output char
-    drain_voltages_output_char = bias_instructions[1][2][flavor_index]
-    gate_voltages_output_char = bias_instructions[1][3][flavor_index]
-    body_voltages_output_char = bias_instructions[1][1][flavor_index]
-
-    DAQ_mux_ds_top.write('ROUTe:OPEN:ALL') #open everything to start
-    DAQ_mux_gs_bottom.write('ROUTe:OPEN:ALL')  # open everything to start
-
-    DAQ_mux_ds_top.write(':FUNC "VOLT:DC"')  # Configure DC voltage mode
-    DAQ_mux_gs_bottom.write(':FUNC "VOLT:DC"')  # Configure DC voltage mode
+    drain_voltages_output_char = set2_instructions[2][flavor_index]
+    gate_voltages_output_char = set2_instructions[3][flavor_index]
+    body_voltages_output_char = set2_instructions[1][flavor_index]
 
     #two vs 4 wire measurements on the mux are automatically configured based on if
     # you have both the force and sense channels open, so no additional configuration for the mux is needed
 
+    # channels are collected here; each mux is then set up with one compound message after the loop
+    ds_channels = []
+    gs_channels = []
+
     # mux_dict is something like: { "Mux1": [...], "Mux2": [...] }
     for mux_name, mux_instructions in mux_dict.items():
         print(f"  → Setting up {mux_name}")
@@ -373,18 +364,23 @@ for transistor_key, mux_dict in mux_data.items():
             keithley_channel = 100 + channel_idx
 
             if "DS" in bias_type: #look at top daq
-                # Close the channel:
-                DAQ_mux_ds_top.write(f"ROUT:CLOS (@{keithley_channel})")
-                print(f"    Closed channel {keithley_channel} "
+                ds_channels.append(keithley_channel)
+                print(f"    Closing channel {keithley_channel} "
                   f"(bias={bias_type}, operation={operation}) in top DAQ/MUX for DS")
             elif "GS" in bias_type: #look at bottom daq
-                # Close the channel:
-                DAQ_mux_gs_bottom.write(f"ROUT:CLOS (@{keithley_channel})")
-                print(f"    Closed channel {keithley_channel} "
+                gs_channels.append(keithley_channel)
+                print(f"    Closing channel {keithley_channel} "
                   f"(bias={bias_type}, operation={operation}) in bottom DAQ/MUX for GS")
             else:
                 print('Invalid bias terminals, not GS or DS')
 
+    # Open everything, configure DC voltage mode and close the channels in one write per mux
+    for DAQ_mux, channels in ((DAQ_mux_ds_top, ds_channels), (DAQ_mux_gs_bottom, gs_channels)):
+        mux_commands = ['ROUTe:OPEN:ALL', ':FUNC "VOLT:DC"']
+        if channels:
+            mux_commands.append(f":ROUT:CLOS (@{','.join(map(str, channels))})")
+        DAQ_mux.write(';'.join(mux_commands))
+
     start_time = time.time()
     os.makedirs(f'{data_folder}/{flavor}/{transistor_key}', exist_ok=True)
 
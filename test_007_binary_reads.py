@@ -0,0 +1,92 @@
+import ast
+import os
+import unittest
+import numpy as np
+
+#-------------------------------------------------------Definitions-----------------------------------------------------
+script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '02_take_measurements.py')
+
+
+def load_measurement_helpers(path=script_path):
+    """
+    Loads the helper functions of 02_take_measurements.py without running its main
+    measurement script (and without needing pyvisa or a display).
+    """
+    with open(path) as f:
+        source = f.read()
+    main_line = source[:source.index('MAIN MEASUREMENT SCRIPT')].count('\n')
+    # Keep everything above the main script except the pyvisa/matplotlib imports
+    # and the HEADLESS backend switch
+    helpers = [node for node in ast.parse(source).body
+               if node.lineno < main_line
+               and not (isinstance(node, (ast.Import, ast.ImportFrom))
+                        and any(alias.name.startswith(('pyvisa', 'matplotlib')) for alias in node.names))
+               and not isinstance(node, ast.If)]
+    namespace = {}
+    exec(compile(ast.Module(body=helpers, type_ignores=[]), path, 'exec'), namespace)
+    return namespace
+
+
+class FakeSCPIInstrument:
+    """
+    Stands in for a 2400 answering :READ? with a #0 REAL,32 block. Like a VISA
+    session, a read stops at the termination character while one is set.
+    """
+
+    def __init__(self, values):
+        self.read_termination = '\r'
+        self.payload = b'#0' + np.asarray(values, dtype='<f4').tobytes() + b'\n'
+
+    def query_binary_values(self, command, datatype='f', is_big_endian=False, container=list, data_points=0):
+        block = self.payload
+        if self.read_termination:
+            end = block.find(self.read_termination.encode())
+            if end != -1:
+                block = block[:end + 1]
+        n_points = data_points or (len(block) - 2) // 4
+        if len(block) - 2 < n_points * 4:
+            raise ValueError("binary block shorter than expected")
+        return container(np.frombuffer(block[2:2 + n_points * 4], dtype='<f4'))
+
+
+#-------------------------------------------------------Tests-----------------------------------------------------------
+class BinaryReadTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.helpers = load_measurement_helpers()
+        # A voltage whose little-endian float32 bytes start with 0x0D ('\r')
+        cls.voltage = float(np.frombuffer(b'\x0d\x00\x80\x3f', dtype='<f4')[0])
+        cls.current = 2.5e-6
+
+    def test_payload_contains_carriage_return(self):
+        self.assertIn(b'\r', FakeSCPIInstrument([self.voltage, self.current]).payload)
+
+    def test_fake_truncates_while_termination_is_set(self):
+        instr = FakeSCPIInstrument([self.voltage, self.current])
+        with self.assertRaises(ValueError):
+            instr.query_binary_values(':READ?', data_points=2)
+
+    def test_measure_iv_reads_full_block(self):
+        instr = FakeSCPIInstrument([self.voltage, self.current])
+        v, i = self.helpers['measure_iv'](instr, ascii_command_flavor='SCPI')
+        self.assertEqual(v, self.voltage)
+        self.assertAlmostEqual(i, self.current, delta=1e-12)
+        self.assertEqual(instr.read_termination, '\r')
+
+    def test_set_voltage_and_measure_iv_reads_full_block(self):
+        instr = FakeSCPIInstrument([self.voltage, self.current])
+        v, i = self.helpers['set_voltage_and_measure_iv'](1.0, instr, ascii_command_flavor='SCPI')
+        self.assertEqual(v, self.voltage)
+        self.assertAlmostEqual(i, self.current, delta=1e-12)
+        self.assertEqual(instr.read_termination, '\r')
+
+    def test_measure_current_reads_full_block(self):
+        instr = FakeSCPIInstrument([self.voltage, self.current])
+        self.assertAlmostEqual(self.helpers['measure_current'](instr, ascii_command_flavor='SCPI'),
+                               self.current, delta=1e-12)
+        self.assertEqual(instr.read_termination, '\r')
+
+
+if __name__ == '__main__':
+    unittest.main()